@@ -5,11 +5,25 @@ load_dotenv()
 
 class AppConfig:
     def __init__(self):
+        # "azure" for Blob Storage, "local" to keep every container on the filesystem under LOCAL_STORAGE_ROOT.
+        self.storage_backend = os.getenv("STORAGE_BACKEND", "azure").lower()
+        self.local_storage_root = os.getenv("LOCAL_STORAGE_ROOT", "local_blob_store")
+        # On-disk read-through cache in front of Azure downloads; set BLOB_CACHE_MAX_MB=0 to disable it.
+        self.blob_cache_dir = os.getenv("BLOB_CACHE_DIR", "local_blob_cache")
+        self.blob_cache_max_mb = int(os.getenv("BLOB_CACHE_MAX_MB", "1024"))
+        # "per_symbol" serves each symbol from its own registry model, "pooled" serves all from the "pooled" one.
+        # The registry keeps models/<name>/versions/<version>/model.pkl and points models/<name>/latest.json at
+        # the version to serve.
+        self.model_mode = os.getenv("MODEL_MODE", "per_symbol").lower()
+        # Deserialised models kept in memory by the model registry.
+        self.model_cache_size = int(os.getenv("MODEL_CACHE_SIZE", "32"))
+        # Local copies of memory-mapped model artifacts when storage is remote.
+        self.model_mmap_dir = os.getenv("MODEL_MMAP_DIR", "local_model_cache")
         self.storage_connection = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
         self.cosmos_connection = os.getenv("COSMOS_DB_CONNECTION_STRING")
         self.alpha_vantage_key = os.getenv("ALPHA_VANTAGE_API_KEY")
 
-        if not self.storage_connection or not self.cosmos_connection:
+        if self.storage_backend == "azure" and (not self.storage_connection or not self.cosmos_connection):
             raise ValueError("One or more Azure connection strings are missing from the .env file.")
 
-config = AppConfig()
\ No newline at end of file
+config = AppConfig()
@@ -0,0 +1,19 @@
+SECTORS = {
+    'AAPL': 'Technology', 'MSFT': 'Technology', 'NVDA': 'Technology',
+    'GOOGL': 'Communication', 'META': 'Communication',
+    'AMZN': 'Consumer Discretionary', 'NKE': 'Consumer Discretionary',
+    'JPM': 'Financials', 'BAC': 'Financials', 'WFC': 'Financials', 'GS': 'Financials', 'MS': 'Financials',
+    'C': 'Financials',
+    'UNH': 'Health Care', 'JNJ': 'Health Care', 'PFE': 'Health Care', 'ABBV': 'Health Care', 'MRK': 'Health Care',
+    'TMO': 'Health Care',
+    'WMT': 'Consumer Staples', 'PG': 'Consumer Staples', 'KO': 'Consumer Staples', 'PEP': 'Consumer Staples',
+    'COST': 'Consumer Staples',
+    'BA': 'Industrials', 'CAT': 'Industrials', 'GE': 'Industrials', 'MMM': 'Industrials', 'UPS': 'Industrials',
+    'RTX': 'Industrials',
+}
+
+UNKNOWN_SECTOR = 'Unknown'
+
+
+def sector_of(symbol: str) -> str:
+    return SECTORS.get(symbol, UNKNOWN_SECTOR)
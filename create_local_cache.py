@@ -1,8 +1,8 @@
-import yfinance as yf
-import os
-import time
+import argparse
 import logging
-import pandas as pd
+
+from data_collection.bulk_downloader import BulkDownloader, YFinanceSource
+from data_collection.price_store import PriceStore
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -14,35 +14,55 @@ STOCKS = [
 ]
 
 CACHE_DIR = "local_data_cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
 
 
-def download_all_data():
+def download_all_data(source=None):
     logger.info(f"Starting one-time data download for {len(STOCKS)} stocks...")
-    for symbol in STOCKS:
-        try:
-            logger.info(f"Downloading data for {symbol}...")
-            data = yf.download(symbol, period="2y", interval="1d", progress=False)
-
-            if data.empty:
-                logger.warning(f"No data found for {symbol}. Skipping.")
-                continue
-
-            file_path = os.path.join(CACHE_DIR, f"{symbol}.csv")
-            data.to_csv(file_path)
-
-            logger.info(f"✓ Saved {len(data)} rows for {symbol} to {file_path}")
-            # Be very respectful to the API to avoid getting blocked
-            time.sleep(10)
+    # Batches of tickers share one request; the token bucket keeps us respectful to the API
+    downloader = BulkDownloader(source or YFinanceSource(), PriceStore(CACHE_DIR), batch_size=10,
+                                max_workers=3, requests_per_second=0.5, burst=2)
+    report = downloader.download(STOCKS, period="2y")
 
-        except Exception as e:
-            logger.error(f"Could not download data for {symbol}: {e}")
+    for symbol, latency in sorted(report['latency'].items(), key=lambda item: item[1]):
+        logger.info(f"  {symbol}: {report['rows'][symbol]} rows in {latency:.2f}s")
+    if report['failed']:
+        logger.warning(f"Failed symbols: {sorted(set(report['failed']))}")
 
     logger.info("\n" + "=" * 50)
     logger.info("LOCAL DATA CACHE CREATION COMPLETE!")
+    logger.info(f"{len(report['rows'])} symbols in {report['elapsed']:.1f}s using {report['requests']} requests "
+                f"({report['throughput']:.2f} symbols/s)")
     logger.info("You can now run the main data pipeline.")
     logger.info("=" * 50)
+    return report
+
+
+def refresh_cache(source=None):
+    logger.info(f"Refreshing local data cache for {len(STOCKS)} stocks...")
+    downloader = BulkDownloader(source or YFinanceSource(), PriceStore(CACHE_DIR), batch_size=10,
+                                max_workers=3, requests_per_second=0.5, burst=2)
+    report = downloader.refresh(STOCKS, full_period="2y")
+
+    logger.info(f"Appended bars: {sum(report['appended'].values())} across {len(report['appended'])} symbols")
+    if report['up_to_date']:
+        logger.info(f"Already up to date: {len(report['up_to_date'])} symbols")
+    if report['revised']:
+        logger.warning(f"Re-downloaded after upstream revisions: {report['revised']}")
+    if report['failed']:
+        logger.warning(f"Failed symbols: {sorted(set(report['failed']))}")
+    logger.info(f"Refresh finished in {report['elapsed']:.1f}s using {report['requests']} requests")
+    return report
 
 
 if __name__ == "__main__":
-    download_all_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build or refresh the local market data cache")
+    parser.add_argument("--refresh", action="store_true", help="Only fetch bars newer than what is cached")
+    parser.add_argument("--import-csv", action="store_true", help="Convert legacy CSV files in the cache directory")
+    args = parser.parse_args()
+
+    if args.import_csv:
+        PriceStore(CACHE_DIR).import_csv_dir(CACHE_DIR)
+    elif args.refresh:
+        refresh_cache()
+    else:
+        download_all_data()
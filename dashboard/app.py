@@ -9,15 +9,12 @@ from datetime import datetime, timedelta
 import time
 import sys
 import os
-import io
-import joblib
 import subprocess
 import numpy as np
-from azure.storage.blob import BlobServiceClient
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from config.settings import config
+from data_collection.storage import get_storage
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -59,34 +56,23 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# --- Azure Connection ---
+# --- Storage Connection ---
 @st.cache_resource
-def get_blob_service_client():
+def get_blob_storage():
     try:
-        return BlobServiceClient.from_connection_string(config.storage_connection)
+        return get_storage()
     except Exception as e:
-        st.error(f"❌ Azure connection failed: {e}")
+        st.error(f"❌ Storage connection failed: {e}")
         return None
 
 
 def load_json_from_blob(blob_name):
     try:
-        blob_client = get_blob_service_client().get_blob_client("market-data", blob_name)
-        data = blob_client.download_blob().readall()
-        return json.loads(data)
+        return json.loads(get_blob_storage().get(blob_name))
     except Exception as e:
         return None
 
 
-def load_model_from_blob(blob_name):
-    try:
-        blob_client = get_blob_service_client().get_blob_client("market-data", blob_name)
-        model_data = blob_client.download_blob().readall()
-        return joblib.load(io.BytesIO(model_data))
-    except Exception:
-        return None
-
-
 def execute_real_trading_cycle():
     """Actually execute the trading engine - NO DEMO"""
 
@@ -1,31 +1,33 @@
 import os
+import sys
 import logging
-from azure.storage.blob import BlobServiceClient
-from dotenv import load_dotenv
 
-load_dotenv()
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_collection.storage import get_storage, DEFAULT_CONTAINER
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class AzureDataManager:
     def __init__(self):
-        self.connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-        if not self.connection_string:
-            raise ValueError("Azure Storage connection string not found in .env file.")
-        self.blob_service_client = BlobServiceClient.from_connection_string(self.connection_string)
-
-    def save_data_to_blob(self, blob_name, data, container_name="market-data"):
-        try:
-            container_client = self.blob_service_client.get_container_client(container_name)
-            container_client.get_container_properties()
-        except Exception:
-            container_client.create_container()
-            logger.info(f"Container '{container_name}' created.")
+        self.storage = get_storage()
 
+    def save_data_to_blob(self, blob_name, data, container_name=DEFAULT_CONTAINER):
         try:
-            blob_client = container_client.get_blob_client(blob_name)
-            blob_client.upload_blob(data, overwrite=True)
+            self.storage.put(blob_name, data, container=container_name)
             logger.info(f"Successfully saved data to {container_name}/{blob_name}")
         except Exception as e:
             logger.error(f"Failed to save to blob: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def load_data_from_blob(self, blob_name, container_name=DEFAULT_CONTAINER):
+        return self.storage.get(blob_name, container=container_name)
+
+    def save_many_to_blob(self, items: dict, container_name=DEFAULT_CONTAINER) -> dict:
+        failed = self.storage.put_many(items, container=container_name)
+        for blob_name, error in failed.items():
+            logger.error(f"Failed to save {container_name}/{blob_name}: {error}")
+        return failed
+
+    def load_many_from_blob(self, blob_names, container_name=DEFAULT_CONTAINER) -> dict:
+        return self.storage.get_many(blob_names, container=container_name)
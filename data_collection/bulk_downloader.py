@@ -0,0 +1,279 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class YFinanceSource:
+    def __init__(self, interval: str = "1d"):
+        self.interval = interval
+
+    def fetch(self, symbols, period=None, start=None, end=None) -> dict:
+        import yfinance as yf
+
+        data = yf.download(
+            symbols,
+            period=period if start is None else None,
+            start=start,
+            end=end,
+            interval=self.interval,
+            group_by="ticker",
+            threads=False,
+            progress=False,
+        )
+        if data is None or data.empty:
+            return {}
+
+        frames = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            else:
+                frame = data
+            frames[symbol] = frame.dropna(how="all")
+        return frames
+
+
+class StubSource:
+    # Serves frames from memory so the downloader can be exercised without network access.
+    def __init__(self, frames: dict, latency: float = 0.0, fail_first: int = 0):
+        self.frames = frames
+        self.latency = latency
+        self.fail_first = fail_first
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_csv_dir(cls, directory: str, **kwargs):
+        frames = {}
+        for file in os.listdir(directory):
+            if file.endswith(".csv"):
+                frames[file.split(".")[0]] = pd.read_csv(os.path.join(directory, file), index_col=0, parse_dates=True)
+        return cls(frames, **kwargs)
+
+    def fetch(self, symbols, period=None, start=None, end=None) -> dict:
+        with self.lock:
+            self.calls += 1
+            should_fail = self.calls <= self.fail_first
+        time.sleep(self.latency)
+        if should_fail:
+            raise ConnectionError("Simulated rate limit from stub source")
+
+        frames = {}
+        for symbol in symbols:
+            if symbol not in self.frames:
+                continue
+            frame = self.frames[symbol]
+            if start is not None:
+                frame = frame[frame.index >= pd.Timestamp(start)]
+            if end is not None:
+                frame = frame[frame.index < pd.Timestamp(end)]
+            frames[symbol] = frame.copy()
+        return frames
+
+
+class BulkDownloader:
+    def __init__(self, source, store, batch_size: int = 10, max_workers: int = 4,
+                 requests_per_second: float = 1.0, burst: int = 2, max_retries: int = 4, backoff: float = 2.0,
+                 overlap_bars: int = 3):
+        self.source = source
+        self.store = store
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.overlap_bars = overlap_bars
+        self.lock = threading.Lock()
+
+    def download(self, symbols, period: str = "2y") -> dict:
+        batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        report = {'latency': {}, 'rows': {}, 'failed': [], 'requests': 0}
+        started = time.perf_counter()
+
+        self._run_jobs([(self._download_batch, batch, {'period': period}) for batch in batches], report)
+
+        report['elapsed'] = time.perf_counter() - started
+        report['throughput'] = len(report['rows']) / report['elapsed'] if report['elapsed'] > 0 else 0.0
+        return report
+
+    def _download_batch(self, batch, report, **fetch_kwargs):
+        batch_started = time.perf_counter()
+        frames = self._fetch_with_retry(batch, report, **fetch_kwargs)
+
+        fetched = {}
+        for symbol in batch:
+            data = frames.get(symbol)
+            if data is None or data.empty:
+                logger.warning(f"No data found for {symbol}. Skipping.")
+                with self.lock:
+                    report['failed'].append(symbol)
+                continue
+            fetched[symbol] = data
+
+        for symbol, file_path in self._write(fetched).items():
+            with self.lock:
+                report['rows'][symbol] = len(fetched[symbol])
+                report['latency'][symbol] = time.perf_counter() - batch_started
+            logger.info(f"✓ Saved {len(fetched[symbol])} rows for {symbol} to {file_path}")
+
+    def refresh(self, symbols, full_period: str = "2y") -> dict:
+        report = {'latency': {}, 'rows': {}, 'failed': [], 'requests': 0, 'appended': {}, 'up_to_date': [],
+                  'revised': []}
+        started = time.perf_counter()
+        today = pd.Timestamp.today().normalize()
+
+        # Symbols sharing a start date can share one batch request.
+        groups, missing = {}, []
+        for symbol in symbols:
+            last = self.store.last_timestamp(symbol)
+            if last is None:
+                missing.append(symbol)
+            elif last.normalize() >= today:
+                report['up_to_date'].append(symbol)
+            else:
+                # Re-request a few cached bars so revisions to history can be detected.
+                start = (last - pd.offsets.BDay(self.overlap_bars)).strftime("%Y-%m-%d")
+                groups.setdefault(start, []).append(symbol)
+
+        jobs = [(self._download_batch, missing[i:i + self.batch_size], {'period': full_period})
+                for i in range(0, len(missing), self.batch_size)]
+        for start, group in groups.items():
+            jobs.extend((self._refresh_batch, group[i:i + self.batch_size], {'start': start})
+                        for i in range(0, len(group), self.batch_size))
+        self._run_jobs(jobs, report)
+
+        if report['revised']:
+            logger.warning(f"History revised upstream for {report['revised']}, re-downloading in full...")
+            self._run_jobs([(self._download_batch, report['revised'][i:i + self.batch_size],
+                             {'period': full_period})
+                            for i in range(0, len(report['revised']), self.batch_size)], report)
+
+        report['elapsed'] = time.perf_counter() - started
+        report['throughput'] = len(report['rows']) / report['elapsed'] if report['elapsed'] > 0 else 0.0
+        return report
+
+    def _run_jobs(self, jobs, report):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(fn, batch, report, **kwargs): batch for fn, batch, kwargs in jobs}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Batch {futures[future]} failed after {self.max_retries} retries: {e}")
+                    with self.lock:
+                        report['failed'].extend(futures[future])
+
+    def _refresh_batch(self, batch, report, **fetch_kwargs):
+        batch_started = time.perf_counter()
+        frames = self._fetch_with_retry(batch, report, **fetch_kwargs)
+
+        updated = {}
+        for symbol in batch:
+            new = frames.get(symbol)
+            if new is None or new.empty:
+                with self.lock:
+                    report['up_to_date'].append(symbol)
+                continue
+
+            cached = self._read_cache(symbol)
+            merged, appended, revised = self._merge(cached, new)
+            if revised:
+                with self.lock:
+                    report['revised'].append(symbol)
+                continue
+            if appended == 0 and np.allclose(merged.to_numpy(dtype=float), cached.to_numpy(dtype=float),
+                                             rtol=1e-6, equal_nan=True):
+                with self.lock:
+                    report['up_to_date'].append(symbol)
+                continue
+
+            updated[symbol] = merged, appended
+
+        self._write({symbol: merged for symbol, (merged, _) in updated.items()})
+        for symbol, (merged, appended) in updated.items():
+            with self.lock:
+                report['rows'][symbol] = len(merged)
+                report['appended'][symbol] = appended
+                report['latency'][symbol] = time.perf_counter() - batch_started
+            logger.info(f"✓ Appended {appended} new bars for {symbol}")
+
+    def _merge(self, cached: pd.DataFrame, new: pd.DataFrame):
+        if any(c not in new.columns for c in cached.columns):
+            return cached, 0, True
+        new = new[cached.columns].sort_index()
+        last_cached = cached.index[-1]
+
+        # The final cached bar may have been a partial session, so only earlier overlap counts as a revision.
+        overlap = new.index.intersection(cached.index)
+        history = overlap[overlap < last_cached]
+        if len(history):
+            before = cached.loc[history].to_numpy(dtype=float)
+            after = new.loc[history].to_numpy(dtype=float)
+            if not np.allclose(before, after, rtol=1e-6, equal_nan=True):
+                return cached, 0, True
+
+        merged = pd.concat([cached[cached.index < new.index[0]], new])
+        return merged, int((new.index > last_cached).sum()), False
+
+    def _read_cache(self, symbol: str) -> pd.DataFrame:
+        return self.store.read(symbol).dropna(subset=["Close"])
+
+    def _fetch_with_retry(self, batch, report, **fetch_kwargs) -> dict:
+        frames = {}
+        pending = list(batch)
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            with self.lock:
+                report['requests'] += 1
+            try:
+                frames.update(self.source.fetch(pending, **fetch_kwargs))
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"Request for {pending} failed ({e}), retrying...")
+            else:
+                # Symbols that came back empty are retried on their own.
+                pending = [s for s in pending if s not in frames or frames[s].empty]
+                if not pending or attempt == self.max_retries:
+                    break
+
+            time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0))
+        return frames
+
+    def _write(self, frames: dict) -> dict:
+        # The whole batch in one store call, so the catalog is rewritten once per batch.
+        return self.store.write_many({symbol: data[[c for c in data.columns if c in PRICE_COLUMNS or c == "Adj Close"]]
+                                      for symbol, data in frames.items()})
@@ -1,63 +1,146 @@
 import os
-import pandas as pd
-from datetime import datetime
 import logging
-import io
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from feature_engineering import FeatureEngineer
-from azure_storage import AzureDataManager
+from feature_dataset import FeatureDataset
+from price_store import PriceStore, PRICE_COLUMNS
+from feature_store import FeatureStore, hash_bars
+from dtype_policy import apply_dtype_policy
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+_worker_engineer = None
+_worker_dataset = None
+
+
+def _init_worker():
+    global _worker_engineer, _worker_dataset
+    _worker_engineer = FeatureEngineer()
+    _worker_dataset = FeatureDataset()
+
+
+def _finish_features(feature_engineer, dataset, symbol, status, bars, cached=None, features=None, horizon=5):
+    since_year = None
+    if status == 'append':
+        raw = feature_engineer.extend_features(cached, bars)
+        # Targets look `horizon` bars ahead, so the last cached rows change too; earlier years stay as they are.
+        since_year = raw.index[max(len(cached) - horizon, 0)].year
+    elif features is None:
+        raw = feature_engineer.create_features(bars.copy())
+    else:
+        raw = features
+
+    features_df = feature_engineer.create_target_variables(raw.copy(), horizon=horizon)
+    features_df = apply_dtype_policy(feature_engineer.validate_features(features_df))
+    return raw, dataset.encode(symbol, features_df, since_year), since_year is None
+
+
+def _build_features_in_worker(local_data_dir, feature_store_root, symbol, force):
+    bars = PriceStore(local_data_dir).read(symbol, columns=PRICE_COLUMNS).dropna(subset=PRICE_COLUMNS)
+    feature_store = FeatureStore(FeatureEngineer.config_version(), feature_store_root)
+    bars_hash = hash_bars(bars)
+    status, cached = ('miss', None) if force else feature_store.lookup(symbol, bars, bars_hash)
+    if status == 'hit':
+        return status, bars_hash, None, None, False
+    return (status, bars_hash) + _finish_features(_worker_engineer, _worker_dataset, symbol, status, bars, cached)
+
 
 class DataPipeline:
     def __init__(self):
         self.feature_engineer = FeatureEngineer()
-        self.azure_manager = AzureDataManager()
+        self.dataset = FeatureDataset()
         self.local_data_dir = "local_data_cache"
-        self.all_stocks = [f.split('.')[0] for f in os.listdir(self.local_data_dir) if f.endswith('.csv')]
-        self.stats = {'processed': 0, 'failed': 0}
+        self.price_store = PriceStore(self.local_data_dir)
+        self.feature_store = FeatureStore(FeatureEngineer.config_version())
+        self.all_stocks = self.price_store.symbols()
+        self.stats = {'processed': 0, 'failed': 0, 'skipped': 0, 'extended': 0}
 
-    def run_pipeline(self):
+    def run_pipeline(self, force=False, workers=1, upload_workers=4):
         logger.info(f"Starting pipeline from LOCAL CACHE for {len(self.all_stocks)} stocks...")
 
-        for symbol in self.all_stocks:
+        # Uploads run on threads so they overlap with feature computation.
+        with ThreadPoolExecutor(max_workers=upload_workers) as uploader:
+            uploads = {}
+            if workers > 1:
+                logger.info(f"Computing features on {workers} worker processes...")
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                    futures = {executor.submit(_build_features_in_worker, self.local_data_dir,
+                                               self.feature_store.root, symbol, force): symbol
+                               for symbol in self.all_stocks}
+                    for future in as_completed(futures):
+                        symbol = futures[future]
+                        try:
+                            self._submit_upload(uploader, uploads, symbol, *future.result())
+                        except Exception as e:
+                            logger.error(f"Pipeline failed for {symbol}: {e}")
+                            self.stats['failed'] += 1
+            else:
+                self._run_in_process(uploader, uploads, force)
+
+            for future in as_completed(uploads):
+                symbol = uploads[future]
+                try:
+                    future.result()
+                    self.stats['processed'] += 1
+                except Exception as e:
+                    logger.error(f"Upload failed for {symbol}: {e}")
+                    self.stats['failed'] += 1
+
+        logger.info("=" * 50)
+        logger.info(f"PIPELINE COMPLETE. Success: {self.stats['processed']}, Failed: {self.stats['failed']}, "
+                    f"Unchanged: {self.stats['skipped']}, Extended: {self.stats['extended']}")
+
+    def _run_in_process(self, uploader, uploads, force):
+        frames = {symbol: df.dropna(subset=PRICE_COLUMNS)
+                  for symbol, df in self.price_store.read_many(self.all_stocks, columns=PRICE_COLUMNS).items()}
+        lookups = {}
+        for symbol, bars in frames.items():
+            bars_hash = hash_bars(bars)
+            lookups[symbol] = (bars_hash,) + (('miss', None) if force else
+                                              self.feature_store.lookup(symbol, bars, bars_hash))
+
+        # Symbols needing a full computation share one vectorised panel pass.
+        misses = {symbol: frames[symbol].copy() for symbol, lookup in lookups.items() if lookup[1] == 'miss'}
+        panel_features = self.feature_engineer.create_panel_features(misses)
+
+        for symbol, (bars_hash, status, cached) in lookups.items():
             try:
-                file_path = os.path.join(self.local_data_dir, f"{symbol}.csv")
-
-                hist_data = pd.read_csv(
-                    file_path,
-                    index_col=0,
-                    parse_dates=True,
-                    date_parser=lambda x: pd.to_datetime(x, format="%Y-%m-%d", errors='coerce')
-                )
-
-                hist_data = hist_data.apply(pd.to_numeric, errors='coerce')
-                hist_data.dropna(subset=["Open", "High", "Low", "Close", "Volume"], inplace=True)
-                features_df = self.feature_engineer.create_features(hist_data)
-                features_df = self.feature_engineer.create_target_variables(features_df)
-                features_df = self.feature_engineer.validate_features(features_df)
-
-                self._save_features(symbol, features_df)
-                self.stats['processed'] += 1
+                if status == 'hit':
+                    self._submit_upload(uploader, uploads, symbol, status, bars_hash, None, None, False)
+                    continue
+                self._submit_upload(uploader, uploads, symbol, status, bars_hash,
+                                    *_finish_features(self.feature_engineer, self.dataset, symbol, status,
+                                                      frames[symbol], cached, panel_features.get(symbol)))
             except Exception as e:
                 logger.error(f"Pipeline failed for {symbol}: {e}")
                 self.stats['failed'] += 1
 
-        logger.info("=" * 50)
-        logger.info(f"PIPELINE COMPLETE. Success: {self.stats['processed']}, Failed: {self.stats['failed']}")
+    def _submit_upload(self, uploader, uploads, symbol, status, bars_hash, raw, parts, replace):
+        if status == 'hit':
+            self.stats['skipped'] += 1
+            return
+        if status == 'append':
+            self.stats['extended'] += 1
+        uploads[uploader.submit(self._save_and_record, symbol, bars_hash, raw, parts, replace)] = symbol
 
-    def _save_features(self, symbol, df):
-        buffer = io.BytesIO()
-        df.to_parquet(buffer, index=True)
-        blob_name = f"features/{symbol}/features.parquet"
-        self.azure_manager.save_data_to_blob(blob_name, buffer.getvalue())
+    def _save_and_record(self, symbol, bars_hash, raw, parts, replace):
+        # Only recorded in the feature store once the upload succeeded, so failures are retried next run.
+        self.dataset.write_parts(symbol, parts, replace=replace)
+        self.feature_store.put(symbol, bars_hash, raw)
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build features for every symbol in the local cache")
+    parser.add_argument("--force", action="store_true", help="Recompute features even when cached ones are current")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Feature worker processes")
+    args = parser.parse_args()
+
     pipeline = DataPipeline()
-    pipeline.run_pipeline()
\ No newline at end of file
+    pipeline.run_pipeline(force=args.force, workers=args.workers)
\ No newline at end of file
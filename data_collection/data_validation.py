@@ -6,17 +6,54 @@ logger = logging.getLogger(__name__)
 
 
 class DataValidator:
-    def validate_features(self, df: pd.DataFrame):
-        numeric_df = df.select_dtypes(include=np.number)
+    def validate(self, df: pd.DataFrame):
+        # One NumPy pass over the float columns: infinities become gaps, rows before every column has warmed
+        # up are dropped, and interior gaps are forward-filled only, so no value ever moves back in time.
+        float_columns = [c for c, dtype in df.dtypes.items() if dtype.kind == 'f']
+        # Stacking column arrays avoids pandas' block-wise take when the frame has many blocks.
+        values = np.column_stack([df[c].to_numpy(dtype=np.float64) for c in float_columns]) if float_columns \
+            else np.empty((len(df), 0))
+        n_rows = len(values)
+
+        infinite = np.isinf(values)
+        values[infinite] = np.nan
+        missing = np.isnan(values)
 
-        if np.isinf(numeric_df).values.any():
-            logger.warning("Infinite values found, replacing with NaN.")
-            df.replace([np.inf, -np.inf], np.nan, inplace=True)
+        valid = ~missing
+        first_valid = np.where(valid.any(axis=0), valid.argmax(axis=0), n_rows) if n_rows else np.zeros(0, int)
+        warmup = int(first_valid.max(initial=0))
 
-        if df.isnull().values.any():
-            logger.warning("NaN values found, applying forward/backward fill.")
-            df.fillna(method='ffill', inplace=True)
-            df.fillna(method='bfill', inplace=True)
-            df.dropna(inplace=True)
+        filled = missing[warmup:].sum(axis=0)
+        validated = df.iloc[warmup:]
+        gapped = np.flatnonzero(filled)
+        if gapped.size:
+            validated = validated.copy()
+            rows = np.arange(n_rows)
+            for j in gapped:
+                last_seen = np.maximum.accumulate(np.where(missing[:, j], 0, rows))
+                validated[float_columns[j]] = values[last_seen, j][warmup:]
 
-        return df
\ No newline at end of file
+        report = {
+            'rows_in': n_rows,
+            'warmup_rows_dropped': warmup,
+            'rows_out': len(validated),
+            'columns': {
+                column: {
+                    'inf': int(inf_count),
+                    'warmup_nan': int(min(first, n_rows)),
+                    'filled': int(filled),
+                }
+                for column, inf_count, first, filled in zip(float_columns, infinite.sum(axis=0), first_valid, filled)
+                if inf_count or first or filled
+            },
+        }
+        return validated, report
+
+    def validate_features(self, df: pd.DataFrame):
+        validated, report = self.validate(df)
+        filled = sum(c['filled'] for c in report['columns'].values())
+        infinite = sum(c['inf'] for c in report['columns'].values())
+        if filled or infinite:
+            logger.warning(f"Validation: {infinite} infinite values, {filled} gaps forward-filled, "
+                           f"{report['warmup_rows_dropped']} warm-up rows dropped")
+        return validated
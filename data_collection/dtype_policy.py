@@ -0,0 +1,98 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FLOAT_DTYPE = np.float32
+SMALL_INT_DTYPE = np.int8
+SMALL_INT_COLUMNS = ['day_of_week', 'month']
+TARGET_PREFIX = 'target_'
+# Largest acceptable difference from the float64 result, measured in standard deviations of the column.
+TOLERANCE = 1e-4
+
+
+def policy_dtype(column, dtype):
+    if column in SMALL_INT_COLUMNS or str(column).startswith(TARGET_PREFIX):
+        return SMALL_INT_DTYPE if dtype.kind in 'iub' else FLOAT_DTYPE
+    if dtype.kind == 'f':
+        return FLOAT_DTYPE
+    return None
+
+
+def apply_dtype_policy(df: pd.DataFrame) -> pd.DataFrame:
+    # Computation stays in float64; frames are downcast only where they are stored, trained on or held in memory.
+    casts = {}
+    for column, dtype in df.dtypes.items():
+        target = policy_dtype(column, dtype)
+        if target is not None and dtype != target:
+            casts[column] = target
+    return df.astype(casts) if casts else df
+
+
+def check_tolerance(reference: pd.DataFrame, compact: pd.DataFrame, tolerance: float = TOLERANCE) -> dict:
+    mismatches = {}
+    for column in reference.columns:
+        expected = reference[column].to_numpy(dtype=np.float64)
+        actual = compact[column].to_numpy(dtype=np.float64)
+        if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+            mismatches[column] = float('inf')
+            continue
+        scale = np.nanstd(expected) if np.isfinite(expected).any() else 0.0
+        error = np.nanmax(np.abs(expected - actual), initial=0.0) / (scale or 1.0)
+        if error > tolerance:
+            mismatches[column] = float(error)
+    return mismatches
+
+
+def frame_bytes(frames) -> int:
+    frames = frames.values() if isinstance(frames, dict) else frames
+    return int(sum(df.memory_usage(index=True, deep=True).sum() for df in frames))
+
+
+def memory_report(frames: dict) -> dict:
+    before = frame_bytes(frames)
+    after = frame_bytes(apply_dtype_policy(df) for df in frames.values())
+    return {
+        'symbols': len(frames),
+        'bytes_before': before,
+        'bytes_after': after,
+        'ratio': after / before if before else 1.0,
+    }
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from feature_engineering import FeatureEngineer
+    from indicators import synthetic_ohlcv
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    n_bars, n_symbols = 2520, 100
+    data = synthetic_ohlcv(n_bars, n_symbols)
+    index = pd.bdate_range("2015-01-01", periods=n_bars)
+    prices = {f"SYM{j}": pd.DataFrame({c: data[c][:, j] for c in data}, index=index) for j in range(n_symbols)}
+
+    engineer = FeatureEngineer()
+    features = {symbol: engineer.create_target_variables(engineer.create_features(df.copy()))
+                for symbol, df in prices.items()}
+
+    # Features are stored downcast, and at inference they are computed from downcast prices; both must stay close.
+    sample = next(iter(prices))
+    stored = check_tolerance(features[sample], apply_dtype_policy(features[sample]))
+    recomputed = check_tolerance(features[sample],
+                                 engineer.create_target_variables(engineer.create_features(
+                                     apply_dtype_policy(prices[sample]).astype(np.float64))))
+    for name, mismatched in (("stored features", stored), ("features from float32 prices", recomputed)):
+        if mismatched:
+            logger.error(f"❌ {name} exceed tolerance {TOLERANCE}: {mismatched}")
+        else:
+            logger.info(f"✅ {name} within {TOLERANCE} standard deviations of float64")
+
+    for name, frames in (("prices", prices), ("features", features)):
+        report = memory_report(frames)
+        logger.info(f"{name}: {report['bytes_before'] / 1e6:.1f} MB -> {report['bytes_after'] / 1e6:.1f} MB "
+                    f"({report['ratio']:.0%}) across {report['symbols']} symbols")
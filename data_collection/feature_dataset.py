@@ -0,0 +1,116 @@
+import io
+import os
+import sys
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_collection.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+FEATURES_CONTAINER = "features"
+DATASET_PREFIX = "dataset"
+INDEX_COLUMN = "Date"
+# Roughly a quarter of daily bars, so a date filter can skip row groups inside a year file.
+ROW_GROUP_SIZE = 64
+
+
+class FeatureDataset:
+    # One hive-partitioned Parquet dataset for every symbol: dataset/symbol=AAPL/year=2024/part-0.parquet.
+    # Symbol and year are pruned from blob names, columns are projected and dates pushed down to row groups.
+    def __init__(self, storage=None, container: str = FEATURES_CONTAINER, prefix: str = DATASET_PREFIX):
+        self.storage = storage or get_storage()
+        self.container = container
+        self.prefix = prefix
+
+    def blob_name(self, symbol: str, year: int) -> str:
+        return f"{self.prefix}/symbol={symbol}/year={year}/part-0.parquet"
+
+    def partitions(self, symbols=None) -> dict:
+        # {symbol: {year: blob_name}} from a single listing.
+        wanted = None if symbols is None else set(symbols)
+        found = {}
+        for name in self.storage.list(prefix=f"{self.prefix}/symbol=", container=self.container):
+            parts = name.split("/")
+            if len(parts) != 4 or not parts[1].startswith("symbol=") or not parts[2].startswith("year="):
+                continue
+            symbol, year = parts[1][len("symbol="):], int(parts[2][len("year="):])
+            if wanted is None or symbol in wanted:
+                found.setdefault(symbol, {})[year] = name
+        return found
+
+    def symbols(self) -> list:
+        return sorted(self.partitions())
+
+    def encode(self, symbol: str, df: pd.DataFrame, since_year: int = None) -> dict:
+        # {blob_name: parquet bytes} per year; only years >= since_year when the earlier ones are unchanged.
+        table = pa.Table.from_pandas(df.rename_axis(INDEX_COLUMN).reset_index(), preserve_index=False)
+        years = pd.DatetimeIndex(df.index).year
+        parts = {}
+        for year in sorted(set(years)):
+            if since_year is not None and year < since_year:
+                continue
+            rows = (years == year).nonzero()[0]
+            buffer = io.BytesIO()
+            pq.write_table(table.slice(rows[0], len(rows)), buffer, row_group_size=ROW_GROUP_SIZE,
+                           write_statistics=True)
+            parts[self.blob_name(symbol, year)] = buffer.getvalue()
+        return parts
+
+    def write_parts(self, symbol: str, parts: dict, replace: bool = False):
+        failed = self.storage.put_many(parts, container=self.container)
+        if failed:
+            raise IOError(f"Failed to write {len(failed)} partitions for {symbol}: {list(failed.values())[0]}")
+        if replace:
+            # A full rewrite drops years that no longer exist in the symbol's history.
+            for blob_name in self.partitions([symbol]).get(symbol, {}).values():
+                if blob_name not in parts:
+                    self.storage.delete(blob_name, container=self.container)
+
+    def write(self, symbol: str, df: pd.DataFrame, since_year: int = None):
+        self.write_parts(symbol, self.encode(symbol, df, since_year), replace=since_year is None)
+
+    def read(self, symbols=None, columns=None, start=None, end=None) -> pd.DataFrame:
+        # Rows for every requested symbol, indexed by date, with a 'symbol' column.
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        selected = []
+        for symbol, years in sorted(self.partitions(symbols).items()):
+            for year, blob_name in sorted(years.items()):
+                if (start is None or year >= start.year) and (end is None or year <= end.year):
+                    selected.append((symbol, blob_name))
+        if not selected:
+            return pd.DataFrame()
+
+        read_columns = None if columns is None else [INDEX_COLUMN] + [c for c in columns if c != INDEX_COLUMN]
+        filters = []
+        if start is not None:
+            filters.append((INDEX_COLUMN, ">=", start))
+        if end is not None:
+            filters.append((INDEX_COLUMN, "<=", end))
+
+        def read_part(item):
+            symbol, blob_name = item
+            source = self.storage.local_path(blob_name, container=self.container)
+            if source is None:
+                data = self.storage.get(blob_name, container=self.container)
+                if data is None:
+                    return None
+                source = pa.BufferReader(data)
+            table = pq.read_table(source, columns=read_columns, filters=filters or None)
+            return table.append_column("symbol", pa.array([symbol] * table.num_rows, pa.string()))
+
+        with ThreadPoolExecutor(max_workers=self.storage.max_workers) as executor:
+            tables = [t for t in executor.map(read_part, selected) if t is not None]
+        if not tables:
+            return pd.DataFrame()
+        return pa.concat_tables(tables, promote_options="default").to_pandas().set_index(INDEX_COLUMN)
+
+    def read_symbol(self, symbol: str, columns=None, start=None, end=None) -> pd.DataFrame:
+        df = self.read([symbol], columns=columns, start=start, end=end)
+        return df.drop(columns="symbol") if not df.empty else None
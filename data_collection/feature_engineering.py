@@ -1,16 +1,21 @@
 import pandas as pd
 import numpy as np
 import logging
+import hashlib
+import json
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from data_validation import DataValidator
-import pandas_ta as ta
-
-logging.getLogger('pandas_ta').setLevel(logging.WARNING)
+from indicators import compute_indicators, compute_panel, INDICATOR_COLUMNS
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever a feature's definition changes so cached features are recomputed.
+FEATURE_SET_VERSION = 1
+# Enough history for the recursive (EMA/Wilder) indicators to converge to full-history values (~1e-13).
+TAIL_WARMUP_BARS = 400
+
 
 class FeatureEngineer:
     def __init__(self):
@@ -18,25 +23,55 @@ class FeatureEngineer:
         self.feature_names = []
 
     def create_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        custom_strategy = ta.Strategy(
-            name="MasterStrategy",
-            description="Comprehensive feature set for trading models",
-            ta=[
-                {"kind": "sma", "length": 20},
-                {"kind": "sma", "length": 50},
-                {"kind": "ema", "length": 12},
-                {"kind": "ema", "length": 26},
-                {"kind": "rsi"},
-                {"kind": "macd"},
-                {"kind": "bbands"},
-                {"kind": "atr"},
-                {"kind": "obv"},
-                {"kind": "adx"},
-                {"kind": "cci"},
-                {"kind": "stoch"},
-            ]
-        )
-        df.ta.strategy(custom_strategy)
+        indicators = compute_indicators(df)
+        for column in INDICATOR_COLUMNS:
+            df[column] = indicators[column]
+        return self._add_return_features(df)
+
+    def extend_features(self, cached: pd.DataFrame, bars: pd.DataFrame) -> pd.DataFrame:
+        # Recompute only the warm-up window plus the new bars, then splice the new rows onto the cache.
+        start = max(len(cached) - TAIL_WARMUP_BARS, 0)
+        tail = self.create_features(bars.iloc[start:].copy())
+        new_rows = tail.iloc[len(cached) - start:].copy()
+        # OBV is a running total, so the tail is shifted onto the cached total at the window start.
+        new_rows['OBV'] += cached['OBV'].iloc[start] - tail['OBV'].iloc[0]
+        return pd.concat([cached, new_rows[cached.columns]])
+
+    @staticmethod
+    def config_version() -> str:
+        config = {
+            'version': FEATURE_SET_VERSION,
+            'indicators': INDICATOR_COLUMNS,
+            'extras': ['returns_1d', 'log_returns', 'volatility_20d', 'day_of_week', 'month'],
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+    def create_panel_features(self, frames: dict) -> dict:
+        # Symbols on one shared calendar are computed together in a single (time x symbol) pass.
+        fields = ['Open', 'High', 'Low', 'Close', 'Volume']
+        index = pd.DatetimeIndex(sorted(set().union(*(df.index for df in frames.values())))) if frames else None
+        panel_symbols, results = [], {}
+        for symbol, df in frames.items():
+            positions = index.get_indexer(df.index)
+            if len(positions) and positions[-1] - positions[0] == len(positions) - 1:
+                panel_symbols.append(symbol)
+            else:
+                # Gaps inside a symbol's history would change its rolling windows, so it runs on its own.
+                results[symbol] = self.create_features(df)
+
+        if panel_symbols:
+            arrays = {f: pd.DataFrame({s: frames[s][f] for s in panel_symbols}, index=index).to_numpy(np.float64)
+                      for f in fields}
+            panel = compute_panel(*(arrays[f] for f in fields))
+            for j, symbol in enumerate(panel_symbols):
+                df = frames[symbol]
+                positions = index.get_indexer(df.index)
+                for column in INDICATOR_COLUMNS:
+                    df[column] = panel[column][positions, j]
+                results[symbol] = self._add_return_features(df)
+        return results
+
+    def _add_return_features(self, df: pd.DataFrame) -> pd.DataFrame:
         df['returns_1d'] = df['Close'].pct_change(1)
         df['log_returns'] = np.log(df['Close'] / df['Close'].shift(1))
         df['volatility_20d'] = df['returns_1d'].rolling(20).std()
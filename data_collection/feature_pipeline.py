@@ -2,24 +2,25 @@ import os
 import sys
 import logging
 import pandas as pd
-import pandas_ta as ta
 import yfinance as yf
-from io import BytesIO
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from data_collection.azure_data_manager import AzureDataManager
+from data_collection.feature_dataset import FeatureDataset
+from data_collection.dtype_policy import apply_dtype_policy
+from data_collection.price_store import PRICE_COLUMNS
+from feature_engineering import FeatureEngineer
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
 class FeaturePipeline:
-    def __init__(self, use_azure=True):
-        self.use_azure = use_azure
-        if self.use_azure:
-            self.azure_manager = AzureDataManager(container_name="features")
-            self.azure_manager.create_container_if_not_exists()
+    def __init__(self):
+        # Same features and the same partitioned dataset as DataPipeline, on whichever STORAGE_BACKEND is selected.
+        self.feature_engineer = FeatureEngineer()
+        self.dataset = FeatureDataset()
 
     def run_pipeline(self, symbol: str):
         logger.info(f"🚀 Starting feature pipeline for {symbol}...")
@@ -41,8 +42,7 @@ class FeaturePipeline:
             if df.empty:
                 logger.warning(f"No data returned from yfinance for {symbol}")
                 return None
-            df.rename(columns={"Close": "close", "High": "high", "Low": "low", "Open": "open", "Volume": "volume"},
-                      inplace=True)
+            df = df[PRICE_COLUMNS].tz_localize(None)
             logger.info(f"Downloaded {df.shape[0]} data points.")
             return df
         except Exception as e:
@@ -52,18 +52,9 @@ class FeaturePipeline:
     def create_features(self, df: pd.DataFrame) -> pd.DataFrame:
         logger.info("Calculating technical indicators...")
 
-        df.ta.sma(length=20, append=True)
-        df.ta.sma(length=50, append=True)
-        df.ta.ema(length=20, append=True)
-        df.ta.rsi(length=14, append=True)
-        df.ta.macd(append=True)
-        df.ta.bbands(append=True)
-
-        df['future_price_5d'] = df['close'].shift(-5)
-        df['target_binary_5d'] = (df['future_price_5d'] > df['close']).astype(int)
-
-        df.dropna(inplace=True)
-        df.drop(columns=['future_price_5d'], inplace=True)
+        df = self.feature_engineer.create_features(df)
+        df = self.feature_engineer.create_target_variables(df, horizon=5)
+        df = self.feature_engineer.validate_features(df)
 
         logger.info(f"Feature calculation complete. DataFrame shape: {df.shape}")
         return df
@@ -73,21 +64,10 @@ class FeaturePipeline:
             logger.warning(f"Feature DataFrame for {symbol} is empty. Nothing to save.")
             return
 
-        blob_name = f"{symbol}/features.parquet"
-        logger.info(f"Saving features to {blob_name}...")
+        logger.info(f"Saving features for {symbol} to the feature dataset...")
 
         try:
-            parquet_buffer = BytesIO()
-            df.to_parquet(parquet_buffer, index=True)
-            parquet_buffer.seek(0)
-
-            if self.use_azure:
-                self.azure_manager.upload_blob(blob_name, parquet_buffer.getvalue())
-            else:
-                local_path = os.path.join("features", symbol)
-                os.makedirs(local_path, exist_ok=True)
-                with open(os.path.join(local_path, "features.parquet"), "wb") as f:
-                    f.write(parquet_buffer.getvalue())
+            self.dataset.write(symbol, apply_dtype_policy(df))
 
             logger.info(f"Successfully saved features for {symbol}.")
         except Exception as e:
@@ -100,6 +80,6 @@ if __name__ == '__main__':
         'JPM', 'BAC', 'WFC', 'GS',
     ]
 
-    pipeline = FeaturePipeline(use_azure=True)
+    pipeline = FeaturePipeline()
     for stock_symbol in stocks:
         pipeline.run_pipeline(stock_symbol)
\ No newline at end of file
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from data_collection import indicators as ind
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class FeatureGroup:
+    # lookback is the number of trailing bars that reproduce the full-history value exactly,
+    # or None when the value depends on the whole history (recursive or cumulative indicators).
+    def __init__(self, name: str, columns: list, lookback, compute):
+        self.name = name
+        self.columns = columns
+        self.lookback = lookback
+        self.compute = compute
+
+
+def _returns(b):
+    return b['Close'] / ind._shift(b['Close']) - 1
+
+
+def _volatility(b):
+    return ind._rolling(_returns(b), 20, lambda windows, axis: windows.std(axis=axis, ddof=1))
+
+
+GROUPS = [
+    FeatureGroup('price', PRICE_COLUMNS, 1, lambda b, i: {c: b[c] for c in PRICE_COLUMNS}),
+    FeatureGroup('sma_20', ['SMA_20'], 20, lambda b, i: {'SMA_20': ind.sma(b['Close'], 20)}),
+    FeatureGroup('sma_50', ['SMA_50'], 50, lambda b, i: {'SMA_50': ind.sma(b['Close'], 50)}),
+    FeatureGroup('ema_12', ['EMA_12'], None, lambda b, i: {'EMA_12': ind.ema(b['Close'], 12)}),
+    FeatureGroup('ema_26', ['EMA_26'], None, lambda b, i: {'EMA_26': ind.ema(b['Close'], 26)}),
+    FeatureGroup('rsi', ['RSI_14'], None, lambda b, i: {'RSI_14': ind.rsi(b['Close'], 14)}),
+    FeatureGroup('macd', ['MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9'], None,
+                 lambda b, i: dict(zip(['MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9'],
+                                       ind.macd(b['Close'])))),
+    FeatureGroup('bbands', ['BBL_5_2.0', 'BBM_5_2.0', 'BBU_5_2.0', 'BBB_5_2.0', 'BBP_5_2.0'], 5,
+                 lambda b, i: dict(zip(['BBL_5_2.0', 'BBM_5_2.0', 'BBU_5_2.0', 'BBB_5_2.0', 'BBP_5_2.0'],
+                                       ind.bbands(b['Close'])))),
+    FeatureGroup('atr', ['ATRr_14'], None, lambda b, i: {'ATRr_14': ind.atr(b['High'], b['Low'], b['Close'])}),
+    FeatureGroup('obv', ['OBV'], None, lambda b, i: {'OBV': ind.obv(b['Close'], b['Volume'])}),
+    FeatureGroup('adx', ['ADX_14', 'DMP_14', 'DMN_14'], None,
+                 lambda b, i: dict(zip(['ADX_14', 'DMP_14', 'DMN_14'],
+                                       ind.adx(b['High'], b['Low'], b['Close'])))),
+    FeatureGroup('cci', ['CCI_14_0.015'], 14,
+                 lambda b, i: {'CCI_14_0.015': ind.cci(b['High'], b['Low'], b['Close'])}),
+    # %K needs 14 bars, smoothing %K adds 2 and %D adds 2 more.
+    FeatureGroup('stoch', ['STOCHk_14_3_3', 'STOCHd_14_3_3'], 18,
+                 lambda b, i: dict(zip(['STOCHk_14_3_3', 'STOCHd_14_3_3'],
+                                       ind.stoch(b['High'], b['Low'], b['Close'])))),
+    FeatureGroup('returns_1d', ['returns_1d'], 2, lambda b, i: {'returns_1d': _returns(b)}),
+    FeatureGroup('log_returns', ['log_returns'], 2,
+                 lambda b, i: {'log_returns': np.log(b['Close'] / ind._shift(b['Close']))}),
+    FeatureGroup('volatility_20d', ['volatility_20d'], 21, lambda b, i: {'volatility_20d': _volatility(b)}),
+    FeatureGroup('calendar', ['day_of_week', 'month'], 1,
+                 lambda b, i: {'day_of_week': i.dayofweek.to_numpy(), 'month': i.month.to_numpy()}),
+]
+
+FEATURE_REGISTRY = {column: group for group in GROUPS for column in group.columns}
+
+
+class FeaturePlan:
+    def __init__(self, feature_names: list, groups: list):
+        self.feature_names = list(feature_names)
+        self.groups = groups
+        lookbacks = [g.lookback for g in groups]
+        self.window = None if any(l is None for l in lookbacks) else max(lookbacks, default=1)
+
+    def compute(self, bars: pd.DataFrame) -> pd.DataFrame:
+        arrays = {c: ind._as_2d(bars[c].to_numpy(dtype=np.float64)) for c in PRICE_COLUMNS}
+        columns = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for group in self.groups:
+                for name, values in group.compute(arrays, bars.index).items():
+                    columns[name] = np.asarray(values).reshape(len(bars), -1)[:, 0]
+        return pd.DataFrame({name: columns[name] for name in self.feature_names}, index=bars.index)
+
+    def latest(self, bars: pd.DataFrame) -> pd.DataFrame:
+        # Only the trailing window is touched when every requested feature has a finite lookback.
+        if self.window is not None:
+            bars = bars.iloc[-self.window:]
+        return self.compute(bars).tail(1)
+
+
+def compile_plan(feature_names) -> FeaturePlan:
+    unknown = [name for name in feature_names if name not in FEATURE_REGISTRY]
+    if unknown:
+        raise ValueError(f"No registered computation for features: {unknown}")
+
+    groups = []
+    for name in feature_names:
+        group = FEATURE_REGISTRY[name]
+        if group not in groups:
+            groups.append(group)
+    return FeaturePlan(feature_names, groups)
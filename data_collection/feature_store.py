@@ -0,0 +1,73 @@
+import os
+import json
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def hash_bars(bars: pd.DataFrame) -> str:
+    digest = hashlib.sha256()
+    digest.update(pd.DatetimeIndex(bars.index).asi8.tobytes())
+    digest.update(np.ascontiguousarray(bars[PRICE_COLUMNS].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+class FeatureStore:
+    # Raw (pre-target, pre-validation) features keyed by the hash of their input bars plus the
+    # feature definition version, so unchanged symbols skip computation and upload entirely.
+    def __init__(self, feature_version: str, root: str = "local_feature_store"):
+        self.feature_version = feature_version
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def lookup(self, symbol: str, bars: pd.DataFrame, bars_hash: str = None):
+        manifest = self._manifest(symbol)
+        if manifest is None or manifest['feature_version'] != self.feature_version:
+            return 'miss', None
+
+        bars_hash = bars_hash or hash_bars(bars)
+        if bars_hash == manifest['input_hash']:
+            return 'hit', None
+
+        # New bars appended after unchanged history only need the tail recomputed.
+        rows = manifest['rows']
+        if len(bars) > rows and hash_bars(bars.iloc[:rows]) == manifest['input_hash']:
+            try:
+                return 'append', pd.read_parquet(self._path(symbol, "features.parquet"))
+            except Exception as e:
+                logger.warning(f"Cached features for {symbol} are unreadable ({e}), recomputing.")
+        return 'miss', None
+
+    def put(self, symbol: str, bars_hash: str, features: pd.DataFrame):
+        os.makedirs(os.path.join(self.root, symbol), exist_ok=True)
+        features_path = self._path(symbol, "features.parquet")
+        features.to_parquet(features_path + ".tmp", index=True)
+        os.replace(features_path + ".tmp", features_path)
+
+        # The manifest is written last, so a crash never leaves it pointing at stale features.
+        manifest = {
+            'input_hash': bars_hash,
+            'feature_version': self.feature_version,
+            'rows': len(features),
+            'last_index': str(features.index[-1]) if len(features) else None,
+        }
+        manifest_path = self._path(symbol, "manifest.json")
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def _manifest(self, symbol: str):
+        manifest_path = self._path(symbol, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    def _path(self, symbol: str, name: str) -> str:
+        return os.path.join(self.root, symbol, name)
@@ -0,0 +1,284 @@
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+EPSILON = np.finfo(float).eps
+
+# Same columns, names and order that the pandas_ta "MasterStrategy" produced.
+INDICATOR_COLUMNS = [
+    'SMA_20', 'SMA_50', 'EMA_12', 'EMA_26', 'RSI_14',
+    'MACD_12_26_9', 'MACDh_12_26_9', 'MACDs_12_26_9',
+    'BBL_5_2.0', 'BBM_5_2.0', 'BBU_5_2.0', 'BBB_5_2.0', 'BBP_5_2.0',
+    'ATRr_14', 'OBV', 'ADX_14', 'DMP_14', 'DMN_14', 'CCI_14_0.015',
+    'STOCHk_14_3_3', 'STOCHd_14_3_3',
+]
+
+
+# All kernels take (time,) or (time, symbol) float arrays and work down axis 0.
+def _as_2d(x):
+    x = np.asarray(x, dtype=np.float64)
+    return x.reshape(-1, 1) if x.ndim == 1 else x
+
+
+def _rolling(x, length, func):
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] >= length:
+        out[length - 1:] = func(sliding_window_view(x, length, axis=0), axis=-1)
+    return out
+
+
+def _shift(x, periods=1):
+    out = np.full(x.shape, np.nan)
+    out[periods:] = x[:-periods]
+    return out
+
+
+def _first_valid(x):
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), x.shape[0])
+
+
+def non_zero_range(a, b):
+    # pandas_ta's non_zero_range adds eps to the whole series once any entry is zero; replacing just the zero
+    # entries gives the same quotients to within an ulp and doesn't depend on bars that haven't happened yet.
+    span = a - b
+    return np.where(span == 0, EPSILON, span)
+
+
+def _ewma(x, alpha, adjust, min_periods):
+    # The recursion can't be vectorised over time, so lean on pandas' compiled ewm (column-wise over symbols).
+    return pd.DataFrame(x).ewm(alpha=alpha, adjust=adjust, min_periods=min_periods).mean().to_numpy()
+
+
+def sma(x, length):
+    return _rolling(_as_2d(x), length, np.mean)
+
+
+def ema(x, length):
+    # pandas_ta seeds the EMA with the SMA of the first `length` values.
+    x = _as_2d(x).copy()
+    first = _first_valid(x)
+    rows = np.arange(x.shape[0])[:, None]
+    seed_row = first + length - 1
+    seeds = np.array([x[f:f + length, j].sum() / length if f + length <= x.shape[0] else np.nan
+                      for j, f in enumerate(first)])
+    x[rows < seed_row] = np.nan
+    cols = np.nonzero(seed_row < x.shape[0])[0]
+    x[seed_row[cols], cols] = seeds[cols]
+    return _ewma(x, 2.0 / (length + 1), adjust=False, min_periods=0)
+
+
+def rma(x, length):
+    return _ewma(_as_2d(x), 1.0 / length, adjust=True, min_periods=length)
+
+
+def rsi(close, length=14):
+    change = np.diff(_as_2d(close), axis=0, prepend=np.nan)
+    positive = np.where(change < 0, 0.0, change)
+    negative = np.where(change > 0, 0.0, change)
+    positive_avg = rma(positive, length)
+    negative_avg = rma(negative, length)
+    return 100 * positive_avg / (positive_avg + np.abs(negative_avg))
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, line - signal_line, signal_line
+
+
+def bbands(close, length=5, std=2.0):
+    close = _as_2d(close)
+    mid = sma(close, length)
+    deviation = _rolling(close, length, np.std)
+    lower = mid - std * deviation
+    upper = mid + std * deviation
+    span = non_zero_range(upper, lower)
+    bandwidth = 100 * span / mid
+    percent = non_zero_range(close, lower) / span
+    return lower, mid, upper, bandwidth, percent
+
+
+def true_range(high, low, close):
+    high, low, close = _as_2d(high), _as_2d(low), _as_2d(close)
+    prev_close = _shift(close)
+    ranges = np.stack([high - low, high - prev_close, prev_close - low])
+    tr = np.abs(ranges).max(axis=0)
+    tr[0] = np.nan
+    tr[np.isnan(prev_close)] = np.nan
+    return tr
+
+
+def atr(high, low, close, length=14):
+    return rma(true_range(high, low, close), length)
+
+
+def obv(close, volume):
+    close, volume = _as_2d(close), _as_2d(volume)
+    sign = np.sign(np.diff(close, axis=0, prepend=np.nan))
+    first = _first_valid(close)
+    cols = np.nonzero(first < close.shape[0])[0]
+    sign[first[cols], cols] = 1.0
+    out = np.nancumsum(sign * volume, axis=0)
+    out[np.isnan(close)] = np.nan
+    return out
+
+
+def adx(high, low, close, length=14, scalar=100):
+    high, low, close = _as_2d(high), _as_2d(low), _as_2d(close)
+    atr_ = atr(high, low, close, length)
+    up = high - _shift(high)
+    dn = _shift(low) - low
+    with np.errstate(invalid='ignore'):
+        pos = np.where(np.isnan(up), np.nan, ((up > dn) & (up > 0)) * up)
+        neg = np.where(np.isnan(dn), np.nan, ((dn > up) & (dn > 0)) * dn)
+    pos = np.where(np.abs(pos) < EPSILON, 0.0, pos)
+    neg = np.where(np.abs(neg) < EPSILON, 0.0, neg)
+
+    k = scalar / atr_
+    dmp = k * rma(pos, length)
+    dmn = k * rma(neg, length)
+    dx = scalar * np.abs(dmp - dmn) / (dmp + dmn)
+    return rma(dx, length), dmp, dmn
+
+
+def cci(high, low, close, length=14, c=0.015):
+    typical = (_as_2d(high) + _as_2d(low) + _as_2d(close)) / 3.0
+    mean = sma(typical, length)
+
+    def mean_abs_dev(windows, axis):
+        return np.abs(windows - windows.mean(axis=axis, keepdims=True)).mean(axis=axis)
+
+    mad = _rolling(typical, length, mean_abs_dev)
+    return (typical - mean) / (c * mad)
+
+
+def stoch(high, low, close, k=14, d=3, smooth_k=3):
+    lowest = _rolling(_as_2d(low), k, np.min)
+    highest = _rolling(_as_2d(high), k, np.max)
+    raw = 100 * (_as_2d(close) - lowest) / non_zero_range(highest, lowest)
+    stoch_k = sma(raw, smooth_k)
+    return stoch_k, sma(stoch_k, d)
+
+
+def compute_panel(open_, high, low, close, volume) -> dict:
+    # One pass over (time, symbol) arrays; returns {column name: array of the same shape}.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        macd_line, macd_hist, macd_signal = macd(close)
+        bbl, bbm, bbu, bbb, bbp = bbands(close)
+        adx_, dmp, dmn = adx(high, low, close)
+        stoch_k, stoch_d = stoch(high, low, close)
+        return {
+            'SMA_20': sma(close, 20),
+            'SMA_50': sma(close, 50),
+            'EMA_12': ema(close, 12),
+            'EMA_26': ema(close, 26),
+            'RSI_14': rsi(close),
+            'MACD_12_26_9': macd_line,
+            'MACDh_12_26_9': macd_hist,
+            'MACDs_12_26_9': macd_signal,
+            'BBL_5_2.0': bbl,
+            'BBM_5_2.0': bbm,
+            'BBU_5_2.0': bbu,
+            'BBB_5_2.0': bbb,
+            'BBP_5_2.0': bbp,
+            'ATRr_14': atr(high, low, close),
+            'OBV': obv(close, volume),
+            'ADX_14': adx_,
+            'DMP_14': dmp,
+            'DMN_14': dmn,
+            'CCI_14_0.015': cci(high, low, close),
+            'STOCHk_14_3_3': stoch_k,
+            'STOCHd_14_3_3': stoch_d,
+        }
+
+
+def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    panel = compute_panel(*(df[c].to_numpy(dtype=np.float64) for c in ['Open', 'High', 'Low', 'Close', 'Volume']))
+    return pd.DataFrame({name: values[:, 0] for name, values in panel.items()}, index=df.index)
+
+
+def _pandas_ta_reference(df: pd.DataFrame) -> pd.DataFrame:
+    import pandas_ta as ta
+
+    strategy = ta.Strategy(name="MasterStrategy", ta=[
+        {"kind": "sma", "length": 20}, {"kind": "sma", "length": 50}, {"kind": "ema", "length": 12},
+        {"kind": "ema", "length": 26}, {"kind": "rsi"}, {"kind": "macd"}, {"kind": "bbands"}, {"kind": "atr"},
+        {"kind": "obv"}, {"kind": "adx"}, {"kind": "cci"}, {"kind": "stoch"},
+    ])
+    df = df.copy()
+    df.ta.cores = 0
+    df.ta.strategy(strategy)
+    return df[INDICATOR_COLUMNS]
+
+
+def check_parity(df: pd.DataFrame, rtol=1e-7, atol=1e-7) -> dict:
+    native = compute_indicators(df)
+    reference = _pandas_ta_reference(df)
+    mismatches = {}
+    for column in INDICATOR_COLUMNS:
+        a, b = native[column].to_numpy(), reference[column].to_numpy(dtype=np.float64)
+        if not np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True):
+            mismatches[column] = float(np.nanmax(np.abs(a - b)))
+    return mismatches
+
+
+def synthetic_ohlcv(n_bars=504, n_symbols=1, seed=42) -> dict:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_bars, n_symbols)), axis=0))
+    spread = np.abs(rng.normal(0, 0.01, (n_bars, n_symbols))) * close
+    return {
+        'Open': close + rng.normal(0, 0.005, (n_bars, n_symbols)) * close,
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 50_000_000, (n_bars, n_symbols)).astype(np.float64),
+    }
+
+
+def benchmark(n_bars=504, n_symbols=500, repeat=3) -> dict:
+    data = synthetic_ohlcv(n_bars, n_symbols)
+    index = pd.bdate_range("2023-01-02", periods=n_bars)
+    frames = [pd.DataFrame({c: data[c][:, j] for c in data}, index=index) for j in range(n_symbols)]
+
+    def best_of(fn):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    results = {
+        'per_symbol_native_s': best_of(lambda: [compute_indicators(f) for f in frames]),
+        'panel_native_s': best_of(lambda: compute_panel(data['Open'], data['High'], data['Low'], data['Close'],
+                                                        data['Volume'])),
+    }
+    try:
+        results['per_symbol_pandas_ta_s'] = best_of(lambda: [_pandas_ta_reference(f) for f in frames])
+    except ImportError:
+        logger.warning("pandas_ta is not installed; skipping the reference timing.")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    sample = synthetic_ohlcv()
+    sample_df = pd.DataFrame({c: v[:, 0] for c, v in sample.items()}, index=pd.bdate_range("2023-01-02", periods=504))
+    try:
+        mismatched = check_parity(sample_df)
+        if mismatched:
+            logger.error(f"❌ Parity failures against pandas_ta: {mismatched}")
+        else:
+            logger.info(f"✅ All {len(INDICATOR_COLUMNS)} indicator columns match pandas_ta")
+    except ImportError:
+        logger.warning("pandas_ta is not installed; skipping the parity check.")
+
+    for name, seconds in benchmark().items():
+        logger.info(f"{name}: {seconds:.3f}s")
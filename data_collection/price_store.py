@@ -0,0 +1,188 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from data_collection.dtype_policy import FLOAT_DTYPE
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+INDEX_COLUMN = "Date"
+CATALOG_FILE = "catalog.json"
+
+
+class PriceStore:
+    # One uncompressed Arrow IPC file per symbol, so reads are memory-mapped instead of parsed. Columns are stored
+    # as float32, the dtype policy's in-memory form, so readers can hold the mapped columns without converting them.
+    def __init__(self, root: str = "local_data_cache"):
+        self.root = root
+        self.catalog_path = os.path.join(self.root, CATALOG_FILE)
+        self.lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol}.arrow")
+
+    def symbols(self) -> list:
+        return sorted(self.catalog())
+
+    def exists(self, symbol: str) -> bool:
+        return os.path.exists(self.path(symbol))
+
+    def catalog(self) -> dict:
+        if not os.path.exists(self.catalog_path):
+            if not any(f.endswith(".arrow") for f in os.listdir(self.root)):
+                return {}
+            return self.rebuild_catalog()
+        with open(self.catalog_path) as f:
+            return json.load(f)["symbols"]
+
+    def rebuild_catalog(self) -> dict:
+        logger.info(f"Rebuilding price store catalog for {self.root}...")
+        entries = {}
+        for file in sorted(os.listdir(self.root)):
+            if file.endswith(".arrow"):
+                symbol = file[:-len(".arrow")]
+                entries[symbol] = self._catalog_entry(symbol, self.read_table(symbol))
+        with self.lock:
+            self._write_catalog(entries)
+        return entries
+
+    def changed_since(self, hashes: dict) -> list:
+        return [symbol for symbol, entry in self.catalog().items() if hashes.get(symbol) != entry["content_hash"]]
+
+    def content_hashes(self) -> dict:
+        return {symbol: entry["content_hash"] for symbol, entry in self.catalog().items()}
+
+    def write(self, symbol: str, df: pd.DataFrame, index_column: str = INDEX_COLUMN):
+        return self.write_many({symbol: df}, index_column)[symbol]
+
+    def write_many(self, frames: dict, index_column: str = INDEX_COLUMN) -> dict:
+        # Every file first, then one catalog rewrite for the batch: per-symbol catalog updates make writing the
+        # universe quadratic in its size. Files written before a failure are still catalogued.
+        paths, entries = {}, {}
+        try:
+            for symbol, df in frames.items():
+                paths[symbol], entries[symbol] = self._write_file(symbol, df, index_column)
+        finally:
+            self._update_catalog(entries)
+        return paths
+
+    def _write_file(self, symbol: str, df: pd.DataFrame, index_column: str) -> tuple:
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        arrays = {INDEX_COLUMN: pa.array(pd.DatetimeIndex(df.index).tz_localize(None).values)}
+        for column in df.columns:
+            # from_pandas=False keeps NaN as NaN rather than nulls, which keeps reads zero-copy
+            arrays[str(column)] = pa.array(pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=FLOAT_DTYPE))
+        table = pa.table(arrays)
+
+        file_path = self.path(symbol)
+        tmp_path = file_path + ".tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, file_path)
+        return file_path, self._catalog_entry(symbol, table, index_column)
+
+    def _catalog_entry(self, symbol: str, table: pa.Table, index_column: str = INDEX_COLUMN) -> dict:
+        digest = hashlib.sha256()
+        for name in table.column_names:
+            digest.update(name.encode())
+            for chunk in table.column(name).chunks:
+                digest.update(chunk.to_numpy(zero_copy_only=False).tobytes())
+
+        dates = table.column(INDEX_COLUMN)
+        return {
+            'file': os.path.basename(self.path(symbol)),
+            'index_column': index_column,
+            'schema': {field.name: str(field.type) for field in table.schema},
+            'rows': table.num_rows,
+            'start': str(dates[0].as_py()) if table.num_rows else None,
+            'end': str(dates[table.num_rows - 1].as_py()) if table.num_rows else None,
+            'content_hash': digest.hexdigest(),
+            'updated_at': datetime.now().isoformat(),
+        }
+
+    def _update_catalog(self, entries: dict):
+        if not entries:
+            return
+        with self.lock:
+            catalog = self.catalog()
+            catalog.update(entries)
+            self._write_catalog(catalog)
+
+    def _write_catalog(self, entries: dict):
+        tmp_path = self.catalog_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({'version': 1, 'symbols': entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.catalog_path)
+
+    def read_table(self, symbol: str, columns=None, start=None, end=None) -> pa.Table:
+        with pa.memory_map(self.path(symbol), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+
+        if columns is not None:
+            table = table.select([INDEX_COLUMN] + [c for c in columns if c != INDEX_COLUMN])
+
+        if start is not None or end is not None:
+            # The index is sorted on write, so a date range is a zero-copy slice.
+            dates = table.column(INDEX_COLUMN).to_numpy()
+            lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side="left")
+            hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side="right")
+            table = table.slice(lo, max(hi - lo, 0))
+        return table
+
+    def read(self, symbol: str, columns=None, start=None, end=None) -> pd.DataFrame:
+        table = self.read_table(symbol, columns=columns, start=start, end=end)
+        return table.to_pandas(split_blocks=True).set_index(INDEX_COLUMN)
+
+    def read_many(self, symbols=None, columns=None, start=None, end=None) -> dict:
+        # The catalog says which symbols and columns exist, so each file is opened exactly once.
+        catalog = self.catalog()
+        data = {}
+        for symbol in symbols if symbols is not None else sorted(catalog):
+            if symbol not in catalog:
+                logger.warning(f"{symbol} is not in the price store catalog. Skipping.")
+                continue
+            schema = catalog[symbol]["schema"]
+            symbol_columns = None if columns is None else [c for c in columns if c in schema]
+            try:
+                data[symbol] = self.read(symbol, columns=symbol_columns, start=start, end=end)
+            except Exception as e:
+                logger.error(f"❌ Failed to load {symbol} from price store: {e}")
+        return data
+
+    def last_timestamp(self, symbol: str):
+        entry = self.catalog().get(symbol)
+        if entry is None or entry["end"] is None:
+            return None
+        return pd.Timestamp(entry["end"])
+
+    def import_csv_dir(self, csv_dir: str) -> list:
+        imported, entries = [], {}
+        try:
+            for file in sorted(os.listdir(csv_dir)):
+                if not file.endswith(".csv"):
+                    continue
+                symbol = file.split(".")[0]
+                try:
+                    data = pd.read_csv(os.path.join(csv_dir, file), index_col=0)
+                    index_column = data.index.name or INDEX_COLUMN
+                    data.index = pd.to_datetime(data.index, errors="coerce")
+                    data = data[data.index.notna()].apply(pd.to_numeric, errors="coerce")
+                    data = data.dropna(subset=["Close"])
+                    entries[symbol] = self._write_file(symbol, data, index_column)[1]
+                    imported.append(symbol)
+                    logger.info(f"✓ Imported {len(data)} rows for {symbol} into the price store")
+                except Exception as e:
+                    logger.error(f"Could not import {file}: {e}")
+        finally:
+            self._update_catalog(entries)
+        return imported
@@ -0,0 +1,450 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process lock (Windows): give each process its own BLOB_CACHE_DIR there.
+    fcntl = None
+
+import requests
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError, ResourceNotModifiedError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient, ExponentialRetry
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.settings import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTAINER = "market-data"
+
+
+class StorageBackend:
+    # Blob semantics shared by every backend: containers, '/'-separated names listed by prefix, overwrite
+    # control and an ETag that changes whenever a blob is rewritten.
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+
+    def ensure_container(self, container: str = DEFAULT_CONTAINER):
+        raise NotImplementedError
+
+    def put(self, blob_name: str, data, container: str = DEFAULT_CONTAINER, overwrite: bool = True) -> str:
+        raise NotImplementedError
+
+    def get(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> bytes:
+        raise NotImplementedError
+
+    def etag(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> str:
+        raise NotImplementedError
+
+    def get_with_etag(self, blob_name: str, container: str = DEFAULT_CONTAINER, if_none_match: str = None):
+        # Conditional read: (None, if_none_match) when the blob is unchanged, (None, None) when it is missing,
+        # otherwise (data, etag).
+        etag = self.etag(blob_name, container)
+        if etag is None or etag == if_none_match:
+            return None, etag
+        return self.get(blob_name, container), etag
+
+    def delete(self, blob_name: str, container: str = DEFAULT_CONTAINER):
+        raise NotImplementedError
+
+    def local_path(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> str:
+        # Backends whose blobs are plain files return the path, so readers can open just the byte ranges they need.
+        return None
+
+    def list(self, prefix: str = None, container: str = DEFAULT_CONTAINER) -> list:
+        raise NotImplementedError
+
+    def put_many(self, items: dict, container: str = DEFAULT_CONTAINER, overwrite: bool = True) -> dict:
+        # Returns {blob_name: error} for the uploads that failed after retries.
+        self.ensure_container(container)
+
+        def upload(blob_name):
+            self.put(blob_name, items[blob_name], container, overwrite)
+
+        return self._run_many(upload, list(items))
+
+    def get_many(self, blob_names, container: str = DEFAULT_CONTAINER) -> dict:
+        # Returns {blob_name: bytes or None}; a blob that could not be read is logged and maps to None.
+        results = {}
+
+        def download(blob_name):
+            results[blob_name] = self.get(blob_name, container)
+
+        for blob_name, error in self._run_many(download, list(blob_names)).items():
+            logger.error(f"Failed to download {container}/{blob_name}: {error}")
+            results[blob_name] = None
+        return results
+
+    def _run_many(self, fn, blob_names: list) -> dict:
+        errors = {}
+        if not blob_names:
+            return errors
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(blob_names))) as executor:
+            futures = {executor.submit(fn, blob_name): blob_name for blob_name in blob_names}
+            for future, blob_name in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[blob_name] = e
+        return errors
+
+
+class BlobStorage(StorageBackend):
+    # One BlobServiceClient over a pooled HTTP session, shared by every caller in the process.
+    def __init__(self, connection_string: str = None, max_workers: int = 8, max_retries: int = 3,
+                 backoff: int = 1):
+        super().__init__(max_workers)
+        self.connection_string = connection_string or config.storage_connection
+        if not self.connection_string:
+            raise ValueError("AZURE_STORAGE_CONNECTION_STRING environment variable not set.")
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self.blob_service_client = BlobServiceClient.from_connection_string(
+            self.connection_string,
+            transport=RequestsTransport(session=session, session_owner=False),
+            retry_policy=ExponentialRetry(initial_backoff=backoff, increment_base=2, retry_total=max_retries),
+        )
+        self.containers = set()
+        self.lock = threading.Lock()
+
+    def ensure_container(self, container: str = DEFAULT_CONTAINER):
+        # Checked once per process instead of probing container properties on every write.
+        if container in self.containers:
+            return
+        with self.lock:
+            if container in self.containers:
+                return
+            try:
+                self.blob_service_client.create_container(container)
+                logger.info(f"Container '{container}' created.")
+            except ResourceExistsError:
+                pass
+            self.containers.add(container)
+
+    def put(self, blob_name: str, data, container: str = DEFAULT_CONTAINER, overwrite: bool = True) -> str:
+        self.ensure_container(container)
+        blob_client = self.blob_service_client.get_blob_client(container=container, blob=blob_name)
+        return blob_client.upload_blob(data, overwrite=overwrite)['etag']
+
+    def get(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> bytes:
+        # A missing blob costs one request (a 404) rather than an exists() probe before every download.
+        blob_client = self.blob_service_client.get_blob_client(container=container, blob=blob_name)
+        try:
+            return blob_client.download_blob().readall()
+        except ResourceNotFoundError:
+            return None
+
+    def etag(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> str:
+        blob_client = self.blob_service_client.get_blob_client(container=container, blob=blob_name)
+        try:
+            return blob_client.get_blob_properties().etag
+        except ResourceNotFoundError:
+            return None
+
+    def get_with_etag(self, blob_name: str, container: str = DEFAULT_CONTAINER, if_none_match: str = None):
+        # One request either way: If-None-Match turns an unchanged blob into a bodiless 304.
+        blob_client = self.blob_service_client.get_blob_client(container=container, blob=blob_name)
+        try:
+            if if_none_match:
+                downloader = blob_client.download_blob(etag=if_none_match, match_condition=MatchConditions.IfModified)
+            else:
+                downloader = blob_client.download_blob()
+            return downloader.readall(), downloader.properties.etag
+        except ResourceNotModifiedError:
+            return None, if_none_match
+        except ResourceNotFoundError:
+            return None, None
+
+    def delete(self, blob_name: str, container: str = DEFAULT_CONTAINER):
+        try:
+            self.blob_service_client.get_blob_client(container=container, blob=blob_name).delete_blob()
+        except ResourceNotFoundError:
+            pass
+
+    def list(self, prefix: str = None, container: str = DEFAULT_CONTAINER) -> list:
+        container_client = self.blob_service_client.get_container_client(container)
+        return [blob.name for blob in container_client.list_blobs(name_starts_with=prefix)]
+
+
+class LocalBlobStore(StorageBackend):
+    # Containers are directories under root and blob names are relative paths, so the pipeline can run offline.
+    def __init__(self, root: str = "local_blob_store", max_workers: int = 8):
+        super().__init__(max_workers)
+        self.root = os.path.abspath(root)
+        self.lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, blob_name: str, container: str) -> str:
+        container_dir = os.path.join(self.root, container)
+        path = os.path.normpath(os.path.join(container_dir, blob_name))
+        if not path.startswith(container_dir + os.sep):
+            raise ValueError(f"Invalid blob name: {blob_name}")
+        return path
+
+    def ensure_container(self, container: str = DEFAULT_CONTAINER):
+        os.makedirs(os.path.join(self.root, container), exist_ok=True)
+
+    def put(self, blob_name: str, data, container: str = DEFAULT_CONTAINER, overwrite: bool = True) -> str:
+        path = self._path(blob_name, container)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written beside the target and renamed into place, so readers never see a partial blob.
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self.lock:
+            if not overwrite and os.path.exists(path):
+                os.remove(tmp_path)
+                raise ResourceExistsError(f"The specified blob already exists: {container}/{blob_name}")
+            os.replace(tmp_path, path)
+        return self.etag(blob_name, container)
+
+    def get(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> bytes:
+        try:
+            with open(self._path(blob_name, container), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def etag(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> str:
+        try:
+            stat = os.stat(self._path(blob_name, container))
+        except FileNotFoundError:
+            return None
+        return f'"0x{stat.st_mtime_ns:X}{stat.st_size:X}"'
+
+    def delete(self, blob_name: str, container: str = DEFAULT_CONTAINER):
+        try:
+            os.remove(self._path(blob_name, container))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> str:
+        path = self._path(blob_name, container)
+        return path if os.path.exists(path) else None
+
+    def list(self, prefix: str = None, container: str = DEFAULT_CONTAINER) -> list:
+        container_dir = os.path.join(self.root, container)
+        names = []
+        for directory, _, files in os.walk(container_dir):
+            for file in files:
+                if file.startswith(".") and file.endswith(".tmp"):
+                    continue
+                name = os.path.relpath(os.path.join(directory, file), container_dir).replace(os.sep, "/")
+                if prefix is None or name.startswith(prefix):
+                    names.append(name)
+        return sorted(names)
+
+
+class CachedStorage(StorageBackend):
+    # Read-through, size-bounded LRU cache on local disk in front of another backend. Cached blobs are
+    # revalidated by ETag on every read, so only changed blobs are downloaded again. One directory can be shared by
+    # several processes: index.json is re-read and merged under a file lock before every change, and each file is
+    # named by blob and ETag, so a file never changes content under a process holding an older index.
+    def __init__(self, backend: StorageBackend, root: str = "local_blob_cache", max_bytes: int = 1024 ** 3):
+        super().__init__(backend.max_workers)
+        self.backend = backend
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.root, "index.json")
+        self.lock_path = os.path.join(self.root, "index.lock")
+        self.lock = threading.RLock()
+        self.lock_depth = 0
+        self.stats = {'hits': 0, 'misses': 0, 'bytes_saved': 0, 'bytes_downloaded': 0, 'evictions': 0}
+        os.makedirs(self.root, exist_ok=True)
+        self.entries = OrderedDict()
+        # Keys read from the cache since the index was last saved, most recent last; merged into the next save.
+        self.touched = OrderedDict()
+        self.index_stamp = None
+        with self._index_lock():
+            self._sync()
+
+    @contextmanager
+    def _index_lock(self):
+        # Threads of this process, then other processes on the same directory.
+        with self.lock:
+            if fcntl is None or self.lock_depth:
+                self.lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self.lock_depth -= 1
+                return
+            with open(self.lock_path, "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                self.lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self.lock_depth -= 1
+
+    def _index_file_stamp(self):
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load_index(self) -> OrderedDict:
+        # Least recently used first.
+        try:
+            with open(self.index_path) as f:
+                entries = json.load(f)["entries"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return OrderedDict()
+        return OrderedDict((key, entry) for key, entry in entries
+                           if os.path.exists(os.path.join(self.root, entry['file'])))
+
+    def _sync(self):
+        # Under the index lock: pick up what other processes wrote, keeping this process's recent reads.
+        stamp = self._index_file_stamp()
+        if stamp != self.index_stamp:
+            self.entries = self._load_index()
+            self.index_stamp = stamp
+            for key in self.touched:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({'version': 1, 'entries': list(self.entries.items())}, f)
+        os.replace(tmp_path, self.index_path)
+        self.index_stamp = self._index_file_stamp()
+        self.touched.clear()
+
+    def _key(self, blob_name: str, container: str) -> str:
+        return f"{container}/{blob_name}"
+
+    def _remove_file(self, entry: dict):
+        try:
+            os.remove(os.path.join(self.root, entry['file']))
+        except FileNotFoundError:
+            pass
+
+    def _store(self, key: str, data: bytes, etag: str):
+        file = hashlib.sha1(f"{key}@{etag}".encode()).hexdigest()
+        tmp_path = os.path.join(self.root, f".{file}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._index_lock():
+            self._sync()
+            os.replace(tmp_path, os.path.join(self.root, file))
+            previous = self.entries.pop(key, None)
+            if previous is not None and previous['file'] != file:
+                self._remove_file(previous)
+            self.entries[key] = {'file': file, 'etag': etag, 'size': len(data)}
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        total = sum(entry['size'] for entry in self.entries.values())
+        while total > self.max_bytes and self.entries:
+            _, entry = self.entries.popitem(last=False)
+            total -= entry['size']
+            self.stats['evictions'] += 1
+            self._remove_file(entry)
+
+    def _drop(self, key: str, file: str = None):
+        # Only the entry for `file` when given: another process may already have replaced it.
+        with self._index_lock():
+            self._sync()
+            entry = self.entries.get(key)
+            if entry is not None and (file is None or entry['file'] == file):
+                del self.entries[key]
+                self._remove_file(entry)
+                self._save_index()
+
+    def get(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> bytes:
+        return self.get_with_etag(blob_name, container)[0]
+
+    def get_with_etag(self, blob_name: str, container: str = DEFAULT_CONTAINER, if_none_match: str = None):
+        key = self._key(blob_name, container)
+        with self._index_lock():
+            self._sync()
+            entry = self.entries.get(key)
+        data, etag = self.backend.get_with_etag(blob_name, container, entry['etag'] if entry else None)
+
+        if etag is None:
+            self._drop(key)
+            return None, None
+        if data is None and entry is not None:
+            try:
+                with open(os.path.join(self.root, entry['file']), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                # Evicted or replaced by another process since we looked; fall back to a full download.
+                self._drop(key, entry['file'])
+                return self.get_with_etag(blob_name, container, if_none_match)
+            with self.lock:
+                self.stats['hits'] += 1
+                self.stats['bytes_saved'] += len(data)
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                self.touched.pop(key, None)
+                self.touched[key] = True
+        else:
+            with self.lock:
+                self.stats['misses'] += 1
+                self.stats['bytes_downloaded'] += len(data)
+            self._store(key, data, etag)
+
+        if if_none_match is not None and etag == if_none_match:
+            return None, etag
+        return data, etag
+
+    def put(self, blob_name: str, data, container: str = DEFAULT_CONTAINER, overwrite: bool = True) -> str:
+        # Write-through: the uploaded bytes are cached under the new ETag, so the next read is a hit.
+        etag = self.backend.put(blob_name, data, container, overwrite)
+        self._store(self._key(blob_name, container), data.encode("utf-8") if isinstance(data, str) else data, etag)
+        return etag
+
+    def ensure_container(self, container: str = DEFAULT_CONTAINER):
+        self.backend.ensure_container(container)
+
+    def etag(self, blob_name: str, container: str = DEFAULT_CONTAINER) -> str:
+        return self.backend.etag(blob_name, container)
+
+    def delete(self, blob_name: str, container: str = DEFAULT_CONTAINER):
+        self.backend.delete(blob_name, container)
+        self._drop(self._key(blob_name, container))
+
+    def list(self, prefix: str = None, container: str = DEFAULT_CONTAINER) -> list:
+        return self.backend.list(prefix, container)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def create_storage(backend: str = None) -> StorageBackend:
+    backend = backend or config.storage_backend
+    if backend == "local":
+        return LocalBlobStore(config.local_storage_root)
+    if backend == "azure":
+        if config.blob_cache_max_mb <= 0:
+            return BlobStorage()
+        return CachedStorage(BlobStorage(), config.blob_cache_dir, config.blob_cache_max_mb * 1024 ** 2)
+    raise ValueError(f"Unknown storage backend '{backend}'. Expected 'azure' or 'local'.")
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = create_storage()
+        return _storage
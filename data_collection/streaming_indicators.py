@@ -0,0 +1,331 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from data_collection.indicators import INDICATOR_COLUMNS, EPSILON
+
+NAN = float('nan')
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+FEATURE_COLUMNS = PRICE_COLUMNS + INDICATOR_COLUMNS + ['returns_1d', 'log_returns', 'volatility_20d',
+                                                       'day_of_week', 'month']
+
+
+# Each class keeps constant-size state and does constant work per bar, reproducing the batch kernels in
+# data_collection/indicators.py when fed the same history bar by bar.
+class StreamingEWM:
+    # Scalar form of pandas' ewm().mean() recursion (ignore_na=False).
+    def __init__(self, alpha: float, adjust: bool, min_periods: int = 0):
+        self.alpha = alpha
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self.new_wt = 1.0 if adjust else alpha
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        is_obs = x == x
+        self.nobs += is_obs
+        if self.weighted == self.weighted:
+            self.old_wt *= 1.0 - self.alpha
+            if is_obs:
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + self.new_wt * x) / (self.old_wt + self.new_wt)
+                self.old_wt = self.old_wt + self.new_wt if self.adjust else 1.0
+        elif is_obs:
+            self.weighted = x
+        self.value = self.weighted if self.nobs >= self.min_periods else NAN
+        return self.value
+
+
+class WilderRMA(StreamingEWM):
+    def __init__(self, length: int):
+        super().__init__(1.0 / length, adjust=True, min_periods=length)
+
+
+class RollingSMA:
+    def __init__(self, length: int):
+        self.length = length
+        self.window = deque(maxlen=length)
+        self.total = 0.0
+        self.nans = 0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if len(self.window) == self.length:
+            dropped = self.window[0]
+            if dropped == dropped:
+                self.total -= dropped
+            else:
+                self.nans -= 1
+        self.window.append(x)
+        if x == x:
+            self.total += x
+        else:
+            self.nans += 1
+
+        full = len(self.window) == self.length and self.nans == 0
+        self.value = self.total / self.length if full else NAN
+        return self.value
+
+
+class StreamingEMA:
+    # Seeded with the SMA of the first `length` observations, as pandas_ta does.
+    def __init__(self, length: int):
+        self.length = length
+        self.seed = []
+        self.ewm = StreamingEWM(2.0 / (length + 1), adjust=False)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if len(self.seed) < self.length:
+            if x == x or self.seed:
+                self.seed.append(x)
+            if len(self.seed) == self.length:
+                self.value = self.ewm.update(float(np.sum(self.seed)) / self.length)
+            return self.value
+        self.value = self.ewm.update(x)
+        return self.value
+
+
+class WilderRSI:
+    def __init__(self, length: int = 14):
+        self.positive = WilderRMA(length)
+        self.negative = WilderRMA(length)
+        self.prev_close = NAN
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        change = close - self.prev_close
+        self.prev_close = close
+        positive_avg = self.positive.update(0.0 if change < 0 else change)
+        negative_avg = self.negative.update(0.0 if change > 0 else change)
+        denominator = positive_avg + abs(negative_avg)
+        self.value = 100 * positive_avg / denominator if denominator else NAN
+        return self.value
+
+
+class StreamingMACD:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, close: float) -> tuple:
+        line = self.fast.update(close) - self.slow.update(close)
+        signal_line = self.signal.update(line)
+        self.value = (line, line - signal_line, signal_line)
+        return self.value
+
+
+class StreamingBollinger:
+    def __init__(self, length: int = 5, std: float = 2.0):
+        self.length = length
+        self.std = std
+        self.window = deque(maxlen=length)
+        self.value = (NAN,) * 5
+
+    def update(self, close: float) -> tuple:
+        self.window.append(close)
+        if len(self.window) < self.length:
+            return self.value
+        values = np.fromiter(self.window, dtype=np.float64, count=self.length)
+        mid = values.mean()
+        deviation = values.std()
+        lower, upper = mid - self.std * deviation, mid + self.std * deviation
+        # Zero ranges become eps, as in the batch non_zero_range.
+        span = upper - lower or EPSILON
+        bandwidth = 100 * span / mid if mid else NAN
+        percent = (close - lower or EPSILON) / span
+        self.value = (lower, mid, upper, bandwidth, percent)
+        return self.value
+
+
+class StreamingATR:
+    def __init__(self, length: int = 14):
+        self.rma = WilderRMA(length)
+        self.prev_close = NAN
+        self.value = NAN
+
+    def true_range(self, high: float, low: float, close: float) -> float:
+        prev_close = self.prev_close
+        self.prev_close = close
+        if prev_close != prev_close:
+            return NAN
+        return max(abs(high - low), abs(high - prev_close), abs(prev_close - low))
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.value = self.rma.update(self.true_range(high, low, close))
+        return self.value
+
+
+class StreamingOBV:
+    def __init__(self):
+        self.prev_close = NAN
+        self.value = NAN
+
+    def update(self, close: float, volume: float) -> float:
+        if self.prev_close != self.prev_close:
+            self.value = volume
+        else:
+            change = close - self.prev_close
+            self.value += (change > 0) * volume - (change < 0) * volume
+        self.prev_close = close
+        return self.value
+
+
+class StreamingADX:
+    def __init__(self, length: int = 14, scalar: float = 100):
+        self.scalar = scalar
+        self.atr = StreamingATR(length)
+        self.pos = WilderRMA(length)
+        self.neg = WilderRMA(length)
+        self.dx = WilderRMA(length)
+        self.prev_high = NAN
+        self.prev_low = NAN
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, high: float, low: float, close: float) -> tuple:
+        atr = self.atr.update(high, low, close)
+        up = high - self.prev_high
+        dn = self.prev_low - low
+        self.prev_high, self.prev_low = high, low
+
+        pos = NAN if up != up else (up if up > dn and up > 0 else 0.0)
+        neg = NAN if dn != dn else (dn if dn > up and dn > 0 else 0.0)
+        pos = 0.0 if abs(pos) < EPSILON else pos
+        neg = 0.0 if abs(neg) < EPSILON else neg
+
+        k = self.scalar / atr if atr else NAN
+        dmp = k * self.pos.update(pos)
+        dmn = k * self.neg.update(neg)
+        dx = self.scalar * abs(dmp - dmn) / (dmp + dmn) if dmp + dmn else NAN
+        self.value = (self.dx.update(dx), dmp, dmn)
+        return self.value
+
+
+class StreamingCCI:
+    def __init__(self, length: int = 14, c: float = 0.015):
+        self.length = length
+        self.c = c
+        self.window = deque(maxlen=length)
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        typical = (high + low + close) / 3.0
+        self.window.append(typical)
+        if len(self.window) < self.length:
+            return self.value
+        values = np.fromiter(self.window, dtype=np.float64, count=self.length)
+        mean = values.mean()
+        mad = np.abs(values - mean).mean()
+        self.value = (typical - mean) / (self.c * mad) if mad else NAN
+        return self.value
+
+
+class StreamingStochastic:
+    def __init__(self, k: int = 14, d: int = 3, smooth_k: int = 3):
+        self.k = k
+        self.highs = deque(maxlen=k)
+        self.lows = deque(maxlen=k)
+        self.smooth = RollingSMA(smooth_k)
+        self.signal = RollingSMA(d)
+        self.value = (NAN, NAN)
+
+    def update(self, high: float, low: float, close: float) -> tuple:
+        self.highs.append(high)
+        self.lows.append(low)
+        raw = NAN
+        if len(self.highs) == self.k:
+            lowest, highest = min(self.lows), max(self.highs)
+            span = highest - lowest or EPSILON
+            raw = 100 * (close - lowest) / span
+        stoch_k = self.smooth.update(raw)
+        self.value = (stoch_k, self.signal.update(stoch_k))
+        return self.value
+
+
+class RollingStd:
+    def __init__(self, length: int, ddof: int = 1):
+        self.length = length
+        self.ddof = ddof
+        self.window = deque(maxlen=length)
+
+    def update(self, x: float) -> float:
+        self.window.append(x)
+        if len(self.window) < self.length:
+            return NAN
+        values = np.fromiter(self.window, dtype=np.float64, count=self.length)
+        return float(values.std(ddof=self.ddof))
+
+
+class LiveFeatureState:
+    # Per-symbol indicator state: seed once from history, then update in O(1) as bars arrive.
+    def __init__(self):
+        self.sma_20 = RollingSMA(20)
+        self.sma_50 = RollingSMA(50)
+        self.ema_12 = StreamingEMA(12)
+        self.ema_26 = StreamingEMA(26)
+        self.rsi = WilderRSI(14)
+        self.macd = StreamingMACD(12, 26, 9)
+        self.bbands = StreamingBollinger(5, 2.0)
+        self.atr = StreamingATR(14)
+        self.obv = StreamingOBV()
+        self.adx = StreamingADX(14)
+        self.cci = StreamingCCI(14)
+        self.stoch = StreamingStochastic(14, 3, 3)
+        self.volatility = RollingStd(20)
+        self.prev_close = NAN
+        self.last_timestamp = None
+        self.row = None
+
+    def seed(self, df: pd.DataFrame):
+        bars = df[PRICE_COLUMNS].to_numpy(dtype=np.float64)
+        for timestamp, bar in zip(df.index, bars):
+            self.update(timestamp, *bar)
+        return self
+
+    def update(self, timestamp, open_: float, high: float, low: float, close: float, volume: float) -> dict:
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return self.row
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            macd_line, macd_hist, macd_signal = self.macd.update(close)
+            bbl, bbm, bbu, bbb, bbp = self.bbands.update(close)
+            adx, dmp, dmn = self.adx.update(high, low, close)
+            stoch_k, stoch_d = self.stoch.update(high, low, close)
+            returns = close / self.prev_close - 1 if self.prev_close == self.prev_close else NAN
+            log_returns = math.log(close / self.prev_close) if self.prev_close == self.prev_close else NAN
+
+        self.prev_close = close
+        self.last_timestamp = timestamp
+        self.row = {
+            'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume,
+            'SMA_20': self.sma_20.update(close),
+            'SMA_50': self.sma_50.update(close),
+            'EMA_12': self.ema_12.update(close),
+            'EMA_26': self.ema_26.update(close),
+            'RSI_14': self.rsi.update(close),
+            'MACD_12_26_9': macd_line, 'MACDh_12_26_9': macd_hist, 'MACDs_12_26_9': macd_signal,
+            'BBL_5_2.0': bbl, 'BBM_5_2.0': bbm, 'BBU_5_2.0': bbu, 'BBB_5_2.0': bbb, 'BBP_5_2.0': bbp,
+            'ATRr_14': self.atr.update(high, low, close),
+            'OBV': self.obv.update(close, volume),
+            'ADX_14': adx, 'DMP_14': dmp, 'DMN_14': dmn,
+            'CCI_14_0.015': self.cci.update(high, low, close),
+            'STOCHk_14_3_3': stoch_k, 'STOCHd_14_3_3': stoch_d,
+            'returns_1d': returns,
+            'log_returns': log_returns,
+            'volatility_20d': self.volatility.update(returns),
+            'day_of_week': pd.Timestamp(timestamp).dayofweek,
+            'month': pd.Timestamp(timestamp).month,
+        }
+        return self.row
+
+    def latest_features(self) -> pd.DataFrame:
+        if self.row is None:
+            return None
+        return pd.DataFrame([self.row], index=pd.DatetimeIndex([self.last_timestamp]), columns=FEATURE_COLUMNS)
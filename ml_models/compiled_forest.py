@@ -0,0 +1,225 @@
+import json
+import logging
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledForest:
+    # Every tree of the ensemble flattened into shared node arrays. Leaves point at themselves, so walking all trees
+    # for all rows is max_depth vectorised steps, and one walk yields both the class and its probabilities.
+    # Artifacts compiled before the scaler was stored had it folded into the thresholds and leave these as None.
+    mean = None
+    scale = None
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, feature_names=None,
+                 base_margin=None, mean=None, scale=None):
+        self.feature = feature.astype(np.intp)
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        # children[2 * node + went_left]: one gather per level instead of two plus a select.
+        self.children = np.column_stack([right, left]).ravel().astype(np.intp)
+        self.value = value
+        self.roots = roots.astype(np.intp)
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.feature_names_in_ = feature_names
+        # None: leaves hold class probabilities to average (RandomForest).
+        # Otherwise: leaves hold log-odds to add to this margin (XGBoost binary:logistic).
+        self.base_margin = base_margin
+        # The scaler the trees were trained behind, applied the way StandardScaler does it.
+        self.mean = mean
+        self.scale = scale
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _as_array(self, X):
+        if self.feature_names_in_ is not None and hasattr(X, 'columns') and \
+                list(X.columns) != self.feature_names_in_:
+            X = X[self.feature_names_in_]
+        X = np.atleast_2d(np.asarray(X))
+        if self.mean is not None:
+            # StandardScaler keeps float32 input in float32 between its two steps and works in float64 otherwise.
+            dtype = X.dtype if X.dtype in (np.float32, np.float64) else np.float64
+            X = (X.astype(dtype, copy=False) - self.mean).astype(dtype, copy=False) / self.scale
+        # sklearn and XGBoost both compare float32 features against the split thresholds.
+        return X.astype(np.float32)
+
+    def leaves(self, X):
+        X = self._as_array(X)
+        row_offsets = (np.arange(len(X), dtype=np.intp) * X.shape[1])[:, None]
+        flat = X.ravel()
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            went_left = flat[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + went_left]
+        return nodes
+
+    def predict_with_proba(self, X) -> tuple:
+        values = self.value[self.leaves(X)]
+        if self.base_margin is None:
+            proba = values.mean(axis=1)
+        else:
+            positive = 1.0 / (1.0 + np.exp(-(self.base_margin + values.sum(axis=1))))
+            proba = np.column_stack([1.0 - positive, positive])
+        return self.classes_[proba.argmax(axis=1)], proba
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
+
+    def predict_proba(self, X):
+        return self.predict_with_proba(X)[1]
+
+
+def _scaler_arrays(scaler) -> dict:
+    # Folding the scaler into float64 thresholds moves the split boundaries off the float32 grid the trees compare
+    # on, which flips rows that sit on a boundary (flags, rounded indicators); the scaling is applied to the input
+    # instead.
+    if scaler is None:
+        return {}
+    return {'mean': np.asarray(scaler.mean_, dtype=np.float64), 'scale': np.asarray(scaler.scale_, dtype=np.float64)}
+
+
+def _compile_sklearn(model, scaler=None) -> CompiledForest:
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left < 0
+        ids = np.arange(tree.node_count)
+        tree_feature = np.where(is_leaf, 0, tree.feature)
+        # sklearn compares float32 inputs against float64 thresholds.
+        tree_threshold = np.where(is_leaf, np.inf, tree.threshold)
+        feature.append(tree_feature)
+        threshold.append(tree_threshold)
+        left.append(np.where(is_leaf, ids, tree.children_left) + offset)
+        right.append(np.where(is_leaf, ids, tree.children_right) + offset)
+        counts = tree.value[:, 0, :]
+        value.append(counts / counts.sum(axis=1, keepdims=True))
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    return CompiledForest(np.concatenate(feature).astype(np.int32), np.concatenate(threshold),
+                          np.concatenate(left).astype(np.int32), np.concatenate(right).astype(np.int32),
+                          np.concatenate(value), np.asarray(roots, dtype=np.int32), max_depth,
+                          np.asarray(model.classes_), _feature_names(model, scaler), **_scaler_arrays(scaler))
+
+
+def _compile_xgboost(model, scaler=None) -> CompiledForest:
+    booster = model.get_booster()
+    trees = booster.trees_to_dataframe()
+    try:
+        trees = trees[trees['Tree'] <= model.best_iteration]
+    except AttributeError:
+        pass
+    names = booster.feature_names or [f"f{i}" for i in range(booster.num_features())]
+    positions = {name: i for i, name in enumerate(names)}
+
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for _, tree in trees.groupby('Tree', sort=True):
+        tree = tree.sort_values('Node')
+        ids = tree['Node'].to_numpy()
+        if not np.array_equal(ids, np.arange(len(ids))):
+            raise ValueError("XGBoost tree has pruned node ids; cannot flatten it")
+        is_leaf = (tree['Feature'] == 'Leaf').to_numpy()
+        child = lambda column: np.where(is_leaf, ids, [int(str(c).split('-')[-1]) if isinstance(c, str) else 0
+                                                       for c in tree[column]])
+        tree_feature = np.where(is_leaf, 0, [positions.get(f, 0) for f in tree['Feature']])
+        # XGBoost sends x < split left on float32 values, which is x <= the float32 just below split.
+        split = tree['Split'].fillna(0).to_numpy(dtype=np.float32)
+        tree_threshold = np.where(is_leaf, np.inf, np.nextafter(split, np.float32(-np.inf)).astype(np.float64))
+        feature.append(tree_feature)
+        threshold.append(tree_threshold)
+        left.append(child('Yes') + offset)
+        right.append(child('No') + offset)
+        value.append(np.where(is_leaf, tree['Gain'].to_numpy(dtype=np.float64), 0.0))
+        roots.append(offset)
+        offset += len(ids)
+        max_depth = max(max_depth, _depth(child('Yes'), child('No'), is_leaf))
+
+    config = json.loads(booster.save_config())
+    base_score = float(config['learner']['learner_model_param']['base_score'].strip('[]'))
+    return CompiledForest(np.concatenate(feature).astype(np.int32), np.concatenate(threshold),
+                          np.concatenate(left).astype(np.int32), np.concatenate(right).astype(np.int32),
+                          np.concatenate(value), np.asarray(roots, dtype=np.int32), max_depth,
+                          np.asarray(model.classes_), _feature_names(model, scaler),
+                          base_margin=float(np.log(base_score / (1.0 - base_score))), **_scaler_arrays(scaler))
+
+
+def _depth(yes, no, is_leaf) -> int:
+    depth, frontier = 0, [0]
+    while frontier:
+        frontier = [c for node in frontier if not is_leaf[node] for c in (yes[node], no[node])]
+        depth += bool(frontier)
+    return depth
+
+
+def _feature_names(model, scaler):
+    for source in (scaler, model):
+        names = getattr(source, 'feature_names_in_', None)
+        if names is not None:
+            return list(names)
+    return None
+
+
+def compile_forest(model, scaler=None) -> CompiledForest:
+    # RandomForestClassifier or a binary XGBClassifier; with the scaler it was trained behind, the result takes
+    # raw features.
+    if isinstance(model, RandomForestClassifier):
+        return _compile_sklearn(model, scaler)
+    if type(model).__name__ == 'XGBClassifier' and len(model.classes_) == 2:
+        return _compile_xgboost(model, scaler)
+    raise TypeError(f"Cannot compile {type(model).__name__}")
+
+
+if __name__ == "__main__":
+    import time
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+    from xgboost import XGBClassifier
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    rng = np.random.default_rng(0)
+    columns = [f"feature_{i}" for i in range(20)]
+    X = pd.DataFrame(rng.normal(size=(5000, 20)).astype(np.float32), columns=columns)
+    y = (X['feature_0'] + 0.5 * X['feature_1'] * X['feature_2'] + rng.normal(size=5000) > 0).astype(int)
+    scaler = StandardScaler().set_output(transform="pandas").fit(X)
+
+    def timed(fn, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - started) / repeat
+
+    models = {
+        'RandomForest': RandomForestClassifier(n_estimators=100, max_depth=10, class_weight="balanced",
+                                               random_state=42, n_jobs=-1),
+        'XGBoost': XGBClassifier(n_estimators=200, max_depth=4, tree_method="hist", random_state=42),
+    }
+    for name, model in models.items():
+        model.fit(scaler.transform(X), y)
+        compiled = compile_forest(model, scaler)
+
+        for rows, repeat in ((1, 200), (1000, 20)):
+            batch = X.iloc[:rows]
+
+            def sklearn_path():
+                scaled = scaler.transform(batch)
+                return model.predict(scaled), model.predict_proba(scaled)
+
+            reference = sklearn_path()
+            labels, proba = compiled.predict_with_proba(batch)
+            agreement = (labels == reference[0]).mean()
+            gap = np.abs(proba - reference[1]).max()
+
+            before, after = timed(sklearn_path, repeat), timed(lambda: compiled.predict_with_proba(batch), repeat)
+            logger.info(f"{name} {rows:>4} rows: {before * 1e3:8.2f} ms -> {after * 1e3:7.2f} ms "
+                        f"({before / after:5.1f}x), labels agree {agreement:.1%}, max proba gap {gap:.1e}")
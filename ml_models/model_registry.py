@@ -0,0 +1,275 @@
+import io
+import os
+import sys
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import joblib
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import config
+from data_collection.storage import get_storage, DEFAULT_CONTAINER
+from ml_models.compiled_forest import compile_forest
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_PREFIX = "models"
+
+
+def _serving_package(package: dict):
+    # Everything inference needs, as flat NumPy arrays: the compiled trees and scaler arrays plus feature names.
+    # No sklearn objects, so opening it is just mapping the arrays.
+    try:
+        compiled = compile_forest(package['model'], package.get('scaler'))
+    except (TypeError, ValueError, AttributeError) as e:
+        logger.warning(f"No memory-mappable artifact for {type(package.get('model')).__name__}: {e}")
+        return None
+    serving = {key: value for key, value in package.items() if key not in ('model', 'scaler', 'tuning')}
+    serving['compiled'] = compiled
+    return serving
+
+
+class ModelRegistry:
+    # models/<name>/versions/<version>/ holds model.pkl (the full sklearn/XGBoost package), serving.joblib (the
+    # compiled, memory-mappable form) and metadata.json, written once and never changed; models/<name>/latest.json
+    # names the version to serve. Serving artifacts are opened with mmap from a local file, so every process on the
+    # machine shares one copy of the tree arrays through the page cache. Loaded packages are kept in a bounded LRU.
+    def __init__(self, storage=None, container: str = DEFAULT_CONTAINER, cache_size: int = 32,
+                 mmap_dir: str = None):
+        self.storage = storage or get_storage()
+        self.container = container
+        self.cache_size = cache_size
+        self.mmap_dir = mmap_dir or config.model_mmap_dir
+        self.models = OrderedDict()
+        self.pointers = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'loads': 0, 'evictions': 0}
+
+    def _blob(self, name: str, version: str, filename: str) -> str:
+        return f"{REGISTRY_PREFIX}/{name}/versions/{version}/{filename}"
+
+    def _pointer(self, name: str) -> str:
+        return f"{REGISTRY_PREFIX}/{name}/latest.json"
+
+    def register(self, name: str, package: dict, metadata: dict = None) -> str:
+        buffer = io.BytesIO()
+        joblib.dump(package, buffer)
+        data = buffer.getvalue()
+
+        digest = hashlib.sha256(data).hexdigest()
+        created_at = datetime.now(timezone.utc)
+        version = f"{created_at:%Y%m%dT%H%M%S%fZ}-{digest[:8]}"
+        model = package.get('model')
+        metadata = {
+            'name': name,
+            'version': version,
+            'created_at': created_at.isoformat(),
+            'sha256': digest,
+            'bytes': len(data),
+            'model_class': type(model).__name__ if model is not None else None,
+            'features': package.get('features'),
+            **(metadata or {}),
+        }
+
+        serving = _serving_package(package)
+        if serving is not None:
+            buffer = io.BytesIO()
+            # Uncompressed, so joblib lays the arrays out aligned and they can be mapped straight from the file.
+            joblib.dump(serving, buffer)
+            self.storage.put(self._blob(name, version, "serving.joblib"), buffer.getvalue(), container=self.container,
+                             overwrite=False)
+            metadata['serving_bytes'] = len(buffer.getvalue())
+
+        self.storage.put(self._blob(name, version, "model.pkl"), data, container=self.container, overwrite=False)
+        self.storage.put(self._blob(name, version, "metadata.json"), json.dumps(metadata, indent=2, default=str),
+                         container=self.container, overwrite=False)
+        # The pointer moves only after the version is fully written, so readers never see a partial model.
+        self.storage.put(self._pointer(name), json.dumps(metadata, indent=2, default=str), container=self.container)
+        with self.lock:
+            self.pointers[name] = version
+        logger.info(f"✅ Registered {name} version {version} ({len(data) / 1e6:.1f} MB)")
+        return version
+
+    def latest_version(self, name: str):
+        with self.lock:
+            if name in self.pointers:
+                return self.pointers[name]
+        data = self.storage.get(self._pointer(name), container=self.container)
+        version = json.loads(data)['version'] if data is not None else None
+        with self.lock:
+            self.pointers[name] = version
+        return version
+
+    def refresh(self, name: str = None):
+        # Forget resolved latest pointers so the next load picks up newly registered versions.
+        with self.lock:
+            if name is None:
+                self.pointers.clear()
+            else:
+                self.pointers.pop(name, None)
+
+    def versions(self, name: str) -> list:
+        prefix = f"{REGISTRY_PREFIX}/{name}/versions/"
+        return sorted({blob[len(prefix):].split("/")[0]
+                       for blob in self.storage.list(prefix=prefix, container=self.container)})
+
+    def metadata(self, name: str, version: str = None):
+        version = version or self.latest_version(name)
+        if version is None:
+            return None
+        data = self.storage.get(self._blob(name, version, "metadata.json"), container=self.container)
+        return json.loads(data) if data is not None else None
+
+    def _serving_path(self, name: str, version: str):
+        # A local file to map: the blob itself on a local backend, otherwise a copy downloaded once per version.
+        blob_name = self._blob(name, version, "serving.joblib")
+        path = self.storage.local_path(blob_name, container=self.container)
+        if path is not None:
+            return path if os.path.exists(path) else None
+
+        path = os.path.join(self.mmap_dir, name, version, "serving.joblib")
+        if not os.path.exists(path):
+            data = self.storage.get(blob_name, container=self.container)
+            if data is None:
+                return None
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return path
+
+    def load_full(self, name: str, version: str = None):
+        # The original package with the sklearn/XGBoost model and scaler, for retraining or inspection.
+        version = version or self.latest_version(name)
+        if version is None:
+            return None
+        data = self.storage.get(self._blob(name, version, "model.pkl"), container=self.container)
+        if data is None:
+            logger.warning(f"Model {name} version {version} is missing from the registry")
+            return None
+        return joblib.load(io.BytesIO(data))
+
+    def load(self, name: str, version: str = None):
+        version = version or self.latest_version(name)
+        if version is None:
+            return None
+        key = (name, version)
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                self.stats['hits'] += 1
+                return self.models[key]
+            self.stats['misses'] += 1
+
+        path = self._serving_path(name, version)
+        if path is not None:
+            package = joblib.load(path, mmap_mode='r')
+        else:
+            # Versions registered before serving artifacts existed, or models that can't be compiled.
+            package = self.load_full(name, version)
+            if package is None:
+                return None
+            serving = _serving_package(package)
+            if serving is not None:
+                package['compiled'] = serving['compiled']
+
+        with self.lock:
+            self.stats['loads'] += 1
+            self.models[key] = package
+            self.models.move_to_end(key)
+            while len(self.models) > self.cache_size:
+                self.models.popitem(last=False)
+                self.stats['evictions'] += 1
+        return package
+
+    def prefetch(self, names) -> dict:
+        # Pointers and packages for many names at once, fetched on the storage backend's worker count.
+        names = list(dict.fromkeys(names))
+        with ThreadPoolExecutor(max_workers=self.storage.max_workers) as executor:
+            return dict(zip(names, executor.map(self.load, names)))
+
+
+def _memory_kb() -> dict:
+    # Rss counts shared pages in every process that maps them; Pss splits them between those processes.
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                field, _, value = line.partition(":")
+                if field in ("Rss", "Pss"):
+                    usage[field] = int(value.split()[0])
+    except FileNotFoundError:
+        pass
+    return usage
+
+
+def _benchmark_worker(root: str, names: list, mode: str, barrier, results):
+    import time
+    import numpy as np
+    import pandas as pd
+    from data_collection.storage import LocalBlobStore
+
+    registry = ModelRegistry(LocalBlobStore(root), cache_size=len(names))
+    before = _memory_kb()
+    started = time.perf_counter()
+    packages = {name: registry.load(name) if mode == "mmap" else registry.load_full(name) for name in names}
+    elapsed = time.perf_counter() - started
+    for package in packages.values():
+        # Walking every tree pulls the mapped pages in, so the numbers reflect a model that is actually used.
+        model = package['compiled'] if mode == "mmap" else package['model']
+        model.predict_proba(pd.DataFrame(np.zeros((1, len(package['features'])), dtype=np.float32),
+                                         columns=package['features']))
+    barrier.wait()
+    after = _memory_kb()
+    results.put({'load_s': elapsed, **{k: after.get(k, 0) - before.get(k, 0) for k in after}})
+    barrier.wait()
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import multiprocessing
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    from data_collection.storage import LocalBlobStore
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    n_models, n_processes = 10, 4
+
+    root = tempfile.mkdtemp(prefix="model_registry_bench_")
+    registry = ModelRegistry(LocalBlobStore(root))
+    rng = np.random.default_rng(0)
+    columns = [f"feature_{i}" for i in range(30)]
+    names = [f"SYM{i}" for i in range(n_models)]
+    for name in names:
+        X = pd.DataFrame(rng.normal(size=(2000, len(columns))).astype(np.float32), columns=columns)
+        y = (X['feature_0'] + rng.normal(size=len(X)) > 0).astype(int)
+        scaler = StandardScaler().set_output(transform="pandas").fit(X)
+        model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42).fit(scaler.transform(X), y)
+        registry.register(name, {'model': model, 'scaler': scaler, 'features': columns})
+
+    context = multiprocessing.get_context("spawn")
+    for mode in ("pickle", "mmap"):
+        barrier, results = context.Barrier(n_processes), context.Queue()
+        workers = [context.Process(target=_benchmark_worker, args=(root, names, mode, barrier, results))
+                   for _ in range(n_processes)]
+        for worker in workers:
+            worker.start()
+        reports = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        load_ms = np.mean([r['load_s'] for r in reports]) * 1e3
+        rss = sum(r.get('Rss', 0) for r in reports) / 1024
+        pss = sum(r.get('Pss', 0) for r in reports) / 1024
+        logger.info(f"{mode:>6}: {n_models} models in {load_ms:7.1f} ms per process; {n_processes} processes "
+                    f"add {rss:6.1f} MB RSS, {pss:6.1f} MB PSS in total")
+    shutil.rmtree(root, ignore_errors=True)
@@ -1,144 +1,350 @@
 import sys
 import os
 import logging
+import numpy as np
 import pandas as pd
-import joblib
-import io
+import time
+from datetime import datetime, timedelta
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
 from sklearn.preprocessing import StandardScaler
+from sklearn.utils.class_weight import compute_class_weight
 
-from data_collection.azure_data_manager import AzureDataManager
+from data_collection.feature_dataset import FeatureDataset
+from ml_models.walk_forward import WalkForwardCV, drop_unlabelled_tail
+from ml_models.tuner import SuccessiveHalving, make_estimator
+from ml_models.model_registry import ModelRegistry
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Incremental retraining: new trees (or boosting rounds) are fit on the most recent RECENT_DAYS of history,
+# the forest keeps at most MAX_TREES, and a full rebuild happens every FULL_REBUILD_DAYS or on feature drift.
+RECENT_DAYS = 180
+NEW_TREES = 20
+MAX_TREES = 200
+NEW_ROUNDS = 20
+FULL_REBUILD_DAYS = 30
+# Drift is tested on the last DRIFT_WINDOW rows, or on all the new rows when there are more: each feature's mean
+# shift from the scaler's, over its standard error. Features are autocorrelated, so the error uses the effective row
+# count n(1 - rho)/(1 + rho), with rho the lag-1 autocorrelation of the recent rows before the window.
+DRIFT_WINDOW = 20
+# Median z-score that forces a full rebuild (refitting the scaler invalidates every existing tree): about the 99th
+# percentile on synthetic series without drift, so an update rarely rebuilds by chance.
+DRIFT_THRESHOLD = 1.6
+
 class ModelTrainer:
-    def __init__(self, model_dir="trained_models", use_azure=True):
-        self.model_dir = model_dir
-        if not os.path.exists(self.model_dir):
-            os.makedirs(self.model_dir)
-
-        self.use_azure = use_azure
-        if self.use_azure:
-            self.azure_manager = AzureDataManager(container_name="features")
-        else:
-            self.azure_manager = None
+    def __init__(self, registry: ModelRegistry = None):
+        # Azure or the local filesystem, whichever STORAGE_BACKEND selects.
+        self.dataset = FeatureDataset()
+        self.registry = registry or ModelRegistry()
 
 
-    def train_model(self, symbol: str, target_column: str = "target_binary_5d"):
+    def train_model(self, symbol: str, target_column: str = "target_binary_5d", columns=None, start=None, end=None,
+                    n_jobs: int = -1, model=None, tuning=None):
         logger.info(f"📈 Loading features for {symbol}...")
 
-        df = self._load_features(symbol)
+        df = self._load_features(symbol, columns=None if columns is None else list(columns) + [target_column],
+                                 start=start, end=end)
+        fitted = self.fit_model(symbol, df, target_column, n_jobs=n_jobs, model=model)
+        if fitted is not None:
+            self._save_model(symbol, *fitted, tuning=tuning, metadata=self.training_window(df, target_column))
+        return fitted
+
+    @staticmethod
+    def training_window(df: pd.DataFrame, target_column: str = "target_binary_5d") -> dict:
+        # The last row with a real label, where the next incremental update picks up.
+        if df is None or target_column not in df.columns:
+            return {}
+        labelled = drop_unlabelled_tail(df.dropna(subset=[target_column]))
+        return {'trained_through': labelled.index.max().isoformat()} if not labelled.empty else {}
+
+    @staticmethod
+    def fit_model(symbol: str, df: pd.DataFrame, target_column: str = "target_binary_5d", n_jobs: int = -1,
+                  model=None):
+        # Pure CPU phase, kept free of storage so a scheduler can run it in a worker process.
         if df is None or df.empty:
             logger.error(f"⚠️ No features available for {symbol}. Skipping training.")
-            return
+            return None
 
         if target_column not in df.columns:
             logger.error(f"⚠️ Target column '{target_column}' not found in data for {symbol}")
-            return
+            return None
 
-        df.dropna(subset=[target_column], inplace=True)
+        # The last bars' targets are placeholders until their forward window closes.
+        df = drop_unlabelled_tail(df.dropna(subset=[target_column]))
 
         X = df.drop(columns=[target_column])
         y = df[target_column]
 
-        X = X.select_dtypes(include=["float64", "int64"]).fillna(0) # Fill NaNs in features
+        X = X.select_dtypes(include=np.number).fillna(0) # Fill NaNs in features (stored as float32/int8)
 
         if X.empty:
             logger.error("No features left after cleaning. Stopping.")
-            return
+            return None
 
         logger.info(f"📊 Training set has {X.shape[1]} features and {X.shape[0]} rows.")
 
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-        scaler = StandardScaler()
+        # Scaled frames keep their column names, so the model records feature_names_in_ for inference.
+        scaler = StandardScaler().set_output(transform="pandas")
         X_train_scaled = scaler.fit_transform(X_train)
         X_test_scaled = scaler.transform(X_test)
 
-        model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            class_weight="balanced",
-            random_state=42,
-            n_jobs=-1
-        )
+        model = model if model is not None else ModelTrainer.build_model(n_jobs)
 
-        logger.info("🧠 Training model...")
+        logger.info(f"🧠 Training model for {symbol}...")
         model.fit(X_train_scaled, y_train)
 
         preds = model.predict(X_test_scaled)
         acc = accuracy_score(y_test, preds)
-        logger.info(f"✅ Accuracy on test set: {acc:.4f}")
+        logger.info(f"✅ Accuracy on test set for {symbol}: {acc:.4f}")
         logger.info("\n" + classification_report(y_test, preds))
 
         importances = pd.Series(model.feature_importances_, index=X.columns)
         logger.info("📌 Top 10 Feature Impertances:")
         logger.info(importances.sort_values(ascending=False).head(10))
 
-        self._save_model(symbol, model, scaler)
+        return model, scaler
 
-    def _load_features(self, symbol: str) -> pd.DataFrame:
-        blob_name = f"{symbol}/features.parquet"
+    @staticmethod
+    def build_model(n_jobs: int = -1):
+        return RandomForestClassifier(
+            n_estimators=100,
+            max_depth=10,
+            class_weight="balanced",
+            random_state=42,
+            n_jobs=n_jobs
+        )
 
-        try:
-            if self.use_azure:
-                logger.info(f"🔄 Downloading {blob_name} from Azure Blob Storage...")
-                data_bytes = self.azure_manager.load_data_from_blob(blob_name)
-                if data_bytes is None:
-                    return None
-                df = pd.read_parquet(io.BytesIO(data_bytes))
-            else:
-                local_path = os.path.join("features", symbol, "features.parquet")
-                df = pd.read_parquet(local_path)
-            return df
-        except Exception as e:
-            logger.error(f"Failed to load features for {symbol}: {e}")
+    @staticmethod
+    def rebuild_estimator(package=None):
+        # An unfitted estimator for a full rebuild of a registered model: tune()'s winner when it came from a search,
+        # otherwise the default forest train_model fits. Grown forests aren't cloned, since incremental updates
+        # changed their tree count and class weights.
+        tuning = (package or {}).get('tuning')
+        if tuning:
+            best = tuning['best']
+            return make_estimator(best['family'], best['params'], best['n_estimators'], n_jobs=-1)
+        if package is None or isinstance(package['model'], RandomForestClassifier):
+            return ModelTrainer.build_model()
+        return clone(package['model'])
+
+    def cross_validate(self, symbol: str, target_column: str = "target_binary_5d", n_folds: int = 5,
+                       cv: WalkForwardCV = None) -> pd.DataFrame:
+        # Walk-forward estimate of the same model train_model fits, one row of metrics per fold.
+        df = self._load_features(symbol)
+        if df is None or df.empty or target_column not in df.columns:
+            logger.error(f"⚠️ No features with '{target_column}' for {symbol}. Skipping cross-validation.")
+            return None
+        cv = cv or WalkForwardCV(n_folds=n_folds)
+        table = cv.evaluate(self.build_model(), df, target_column)
+        logger.info(f"📋 Walk-forward folds for {symbol}:\n{table.round(4).to_string()}")
+        return table
+
+    def tune(self, symbol: str, target_column: str = "target_binary_5d", n_candidates: int = 12, eta: int = 3,
+             max_workers: int = None, early_stopping: bool = True):
+        # Successive halving over RF and hist XGBoost on the walk-forward folds, then a full fit of the winner.
+        df = self._load_features(symbol)
+        if df is None or df.empty or target_column not in df.columns:
+            logger.error(f"⚠️ No features with '{target_column}' for {symbol}. Skipping tuning.")
             return None
 
+        search = SuccessiveHalving(n_candidates=n_candidates, eta=eta, max_workers=max_workers,
+                                   early_stopping=early_stopping)
+        tuning = search.search(df, target_column)
+        best = tuning['best']
+        model = make_estimator(best['family'], best['params'], best['n_estimators'], n_jobs=-1)
+        fitted = self.fit_model(symbol, df, target_column, model=model)
+        if fitted is not None:
+            self._save_model(symbol, *fitted, tuning=tuning, metadata=self.training_window(df, target_column))
+        return tuning
+
+    @staticmethod
+    def feature_drift(scaler, X: pd.DataFrame, window: int = DRIFT_WINDOW) -> float:
+        # Median z-score of the last `window` rows' feature means against the scaler's; the rows before them give
+        # each feature's autocorrelation.
+        values = X.to_numpy(dtype=np.float64)
+        window = min(window, len(values))
+        if window == 0 or values.shape[1] == 0:
+            return 0.0
+        tested, before = values[-window:], values[:-window]
+        rho = np.zeros(values.shape[1])
+        if len(before) > 2:
+            centred = before - before.mean(axis=0)
+            variance = (centred ** 2).sum(axis=0)
+            lagged = (centred[1:] * centred[:-1]).sum(axis=0)
+            rho = np.clip(np.divide(lagged, variance, out=np.zeros_like(lagged), where=variance > 0), 0.0, 0.999)
+        effective_rows = np.clip(window * (1 - rho) / (1 + rho), 1.0, window)
+        z = np.abs(tested.mean(axis=0) - scaler.mean_) / scaler.scale_ * np.sqrt(effective_rows)
+        return float(np.nanmedian(z))
+
+    @staticmethod
+    def grow_model(model, scaler, X: pd.DataFrame, y, new_trees: int = NEW_TREES, max_trees: int = MAX_TREES,
+                   new_rounds: int = NEW_ROUNDS):
+        # Adds trees fit on the recent rows to a trained forest, or continues boosting an XGBoost model.
+        X_scaled = scaler.transform(X)
+        if isinstance(model, RandomForestClassifier):
+            if model.class_weight is not None:
+                # "balanced" would be recomputed per fit anyway; explicit weights from the recent rows say so.
+                weights = compute_class_weight("balanced", classes=model.classes_, y=y)
+                model.set_params(class_weight=dict(zip(model.classes_, weights)))
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees)
+            model.fit(X_scaled, y)
+            if len(model.estimators_) > max_trees:
+                # The oldest trees saw the oldest data; dropping them keeps the forest bounded and current.
+                model.estimators_ = model.estimators_[-max_trees:]
+                model.set_params(n_estimators=max_trees)
+            return model
+        if type(model).__name__ == 'XGBClassifier':
+            rounds = model.get_booster().num_boosted_rounds()
+            model.set_params(n_estimators=new_rounds)
+            model.fit(X_scaled, y, xgb_model=model.get_booster(), verbose=False)
+            model.set_params(n_estimators=rounds + new_rounds)
+            return model
+        raise TypeError(f"Cannot grow {type(model).__name__}")
+
+    def retrain(self, symbol: str, target_column: str = "target_binary_5d", force_full: bool = False,
+                full_rebuild_days: int = FULL_REBUILD_DAYS, drift_threshold: float = DRIFT_THRESHOLD) -> dict:
+        # Warm-start the registered model on recent rows; falls back to a full train_model when none exists, the
+        # last full rebuild is too old, or the features have drifted away from what the scaler was fit on.
+        started = time.perf_counter()
+        report = {'symbol': symbol, 'mode': 'full', 'reason': 'forced' if force_full else None}
+        # Loaded even for a forced rebuild, which refits the same kind of estimator.
+        registered = self.registry.load_full(symbol)
+        previous = None if force_full else registered
+        metadata = (self.registry.metadata(symbol) or {}) if previous is not None else {}
+        if previous is None and not force_full:
+            report['reason'] = 'no registered model'
+
+        if previous is not None:
+            last_full = datetime.fromisoformat(metadata.get('last_full_rebuild') or metadata['created_at'])
+            if datetime.now(last_full.tzinfo) - last_full >= timedelta(days=full_rebuild_days):
+                report['reason'] = f'last full rebuild {last_full:%Y-%m-%d}'
+                previous = None
+
+        if previous is not None and not metadata.get('trained_through'):
+            report['reason'] = 'no training window recorded'
+            previous = None
+
+        if previous is not None:
+            trained_through = pd.Timestamp(metadata['trained_through'])
+            features = list(previous['features'])
+            df = self._load_features(symbol, columns=features + [target_column],
+                                     start=trained_through - timedelta(days=RECENT_DAYS))
+            if df is None or df.empty:
+                logger.error(f"⚠️ No recent features for {symbol}. Skipping retraining.")
+                return None
+            df = drop_unlabelled_tail(df.dropna(subset=[target_column]))
+            report['new_rows'] = int((df.index > trained_through).sum())
+            if report['new_rows'] == 0:
+                logger.info(f"✅ {symbol} is up to date through {trained_through:%Y-%m-%d}")
+                return {**report, 'mode': 'skipped', 'elapsed': time.perf_counter() - started}
+
+            X = df[features].fillna(0)
+            report['drift'] = self.feature_drift(previous['scaler'], X, max(report['new_rows'], DRIFT_WINDOW))
+            if report['drift'] > drift_threshold:
+                report['reason'] = f"feature drift {report['drift']:.2f}"
+                previous = None
+
+        if previous is not None:
+            # New trees need every class the model predicts; a recent window without one can't grow it.
+            missing = set(previous['model'].classes_) - set(np.unique(df[target_column]))
+            if missing:
+                report['reason'] = f"recent rows missing class {sorted(missing)}"
+                previous = None
+
+        if previous is None:
+            logger.info(f"🔁 Full retrain for {symbol} ({report['reason']})")
+            fitted = self.train_model(symbol, target_column=target_column, model=self.rebuild_estimator(registered),
+                                      tuning=(registered or {}).get('tuning'))
+            if fitted is None:
+                logger.error(f"❌ Full retrain of {symbol} failed")
+                return None
+        else:
+            model = self.grow_model(previous['model'], previous['scaler'], X, df[target_column])
+            report['mode'] = 'incremental'
+            self._save_model(symbol, model, previous['scaler'], tuning=previous.get('tuning'), metadata={
+                'mode': 'incremental',
+                'last_full_rebuild': metadata.get('last_full_rebuild') or metadata['created_at'],
+                'trained_through': df.index.max().isoformat()})
+        report['elapsed'] = time.perf_counter() - started
+        logger.info(f"✅ {report['mode'].capitalize()} retrain of {symbol} in {report['elapsed']:.1f}s")
+        return report
+
+    def compare_incremental(self, symbol: str, target_column: str = "target_binary_5d", steps: int = 4,
+                            step_rows: int = 20, horizon: int = 5) -> pd.DataFrame:
+        # Replays the last `steps` batches of new rows: one model is grown batch by batch, the other refit from
+        # scratch each time, and both are scored on the rows that follow each batch.
+        df = self._load_features(symbol)
+        if df is None or df.empty or target_column not in df.columns:
+            logger.error(f"⚠️ No features with '{target_column}' for {symbol}. Skipping comparison.")
+            return None
+        df = drop_unlabelled_tail(df.dropna(subset=[target_column]), horizon)
+        X = df.drop(columns=[target_column]).select_dtypes(include=np.number).fillna(0)
+        y = df[target_column]
 
-    def _save_model_to_azure(self, symbol: str, model, scaler):
+        def fit_full(end):
+            scaler = StandardScaler().set_output(transform="pandas").fit(X.iloc[:end])
+            return self.build_model().fit(scaler.transform(X.iloc[:end]), y.iloc[:end]), scaler
+
+        first = len(df) - (steps + 1) * step_rows - horizon
+        model, scaler = fit_full(first)
+        rows = []
+        for step in range(steps):
+            end = first + (step + 1) * step_rows
+            test = slice(end + horizon, end + horizon + step_rows)
+            recent = X.index >= X.index[end - 1] - timedelta(days=RECENT_DAYS)
+            recent[end:] = False
+
+            started = time.perf_counter()
+            model = self.grow_model(model, scaler, X[recent], y[recent])
+            incremental_s = time.perf_counter() - started
+
+            started = time.perf_counter()
+            full_model, full_scaler = fit_full(end)
+            full_s = time.perf_counter() - started
+
+            X_test, y_test = X.iloc[test], y.iloc[test]
+            rows.append({'step': step, 'train_rows': end, 'test_rows': len(y_test),
+                         'incremental_s': incremental_s, 'full_s': full_s,
+                         'incremental_accuracy': accuracy_score(y_test, model.predict(scaler.transform(X_test))),
+                         'full_accuracy': accuracy_score(y_test, full_model.predict(full_scaler.transform(X_test)))})
+
+        table = pd.DataFrame(rows).set_index('step')
+        logger.info(f"📋 Incremental vs full retrain for {symbol}:\n{table.round(4).to_string()}")
+        logger.info(f"⏱️ Incremental {table['incremental_s'].mean():.2f}s vs full {table['full_s'].mean():.2f}s "
+                    f"per update, accuracy {table['incremental_accuracy'].mean():.4f} vs "
+                    f"{table['full_accuracy'].mean():.4f}")
+        return table
+
+    def _load_features(self, symbol: str, columns=None, start=None, end=None) -> pd.DataFrame:
         try:
-            import io
-            import joblib
-
-            model_package = {
-                'model': model,
-                'scaler': scaler,
-                'features': list(model.feature_names_in_),
-                'created_at': datetime.now().isoformat()
-            }
-
-            buffer = io.BytesIO()
-            joblib.dump(model_package, buffer)
-            buffer.seek(0)
-
-            blob_name = f"models/{symbol}/latest_model.pkl"
-
-            from data_collection.azure_storage import AzureDataManager
-            azure_manager = AzureDataManager()
-            azure_manager.save_data_to_blob(blob_name, buffer.getvalue())
-
-            logger.info(f"✅ Model package saved to Azure: {blob_name}")
-
+            logger.info(f"🔄 Reading features for {symbol} from the feature dataset...")
+            return self.dataset.read_symbol(symbol, columns=columns, start=start, end=end)
         except Exception as e:
-            logger.error(f"❌ Failed to save model to Azure: {e}")
-
-    def _save_model(self, symbol: str, model, scaler):
-        model_path = os.path.join(self.model_dir, f"{symbol}_model.joblib")
-        scaler_path = os.path.join(self.model_dir, f"{symbol}_scaler.joblib")
+            logger.error(f"Failed to load features for {symbol}: {e}")
+            return None
 
-        try:
-            joblib.dump(model, model_path)
-            joblib.dump(scaler, scaler_path)
-            logger.info(f"✅ Model saved locally to {model_path}")
-            logger.info(f"✅ Scaler saved locally to {scaler_path}")
 
-            self._save_model_to_azure(symbol, model, scaler)
+    def _save_model(self, symbol: str, model, scaler, tuning=None, metadata=None):
+        model_package = {
+            'model': model,
+            'scaler': scaler,
+            'features': list(model.feature_names_in_),
+            'created_at': datetime.now().isoformat()
+        }
+        metadata = {'mode': 'full', 'last_full_rebuild': datetime.now().isoformat(), **(metadata or {})}
+        if tuning is not None:
+            model_package['tuning'] = tuning
+            metadata['tuning'] = tuning['best']
 
+        try:
+            self.registry.register(symbol, model_package, metadata)
         except Exception as e:
-            logger.error(f"❌ Failed to save model: {e}")
\ No newline at end of file
+            logger.error(f"❌ Failed to save model for {symbol}: {e}")
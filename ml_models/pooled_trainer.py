@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.universe import sector_of
+from ml_models.model_trainer import ModelTrainer
+from ml_models.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+POOLED_MODEL = "pooled"
+ENCODING_COLUMNS = ['symbol_code', 'sector_code']
+# Codes run from 0 to the universe size, with -1 kept for symbols and sectors the model never saw.
+CODE_DTYPE = np.int16
+
+
+def build_encodings(symbols) -> dict:
+    symbols = sorted(set(symbols))
+    sectors = sorted({sector_of(symbol) for symbol in symbols})
+    if len(symbols) > np.iinfo(CODE_DTYPE).max + 1:
+        raise ValueError(f"{len(symbols)} symbols do not fit in {np.dtype(CODE_DTYPE).name} codes")
+    return {'symbols': {symbol: code for code, symbol in enumerate(symbols)},
+            'sectors': {sector: code for code, sector in enumerate(sectors)}}
+
+
+def symbol_codes(symbol: str, encodings: dict) -> dict:
+    # Symbols or sectors the pooled model never saw get -1, so they still share the cross-sectional fit.
+    return {'symbol_code': encodings['symbols'].get(symbol, -1),
+            'sector_code': encodings['sectors'].get(sector_of(symbol), -1)}
+
+
+def encode_symbol(df: pd.DataFrame, symbol: str, encodings: dict) -> pd.DataFrame:
+    df = df.copy()
+    for column, code in symbol_codes(symbol, encodings).items():
+        df[column] = CODE_DTYPE(code)
+    return df
+
+
+def encode_panel(panel: pd.DataFrame, encodings: dict) -> pd.DataFrame:
+    panel = panel.copy()
+    panel['symbol_code'] = panel['symbol'].map(encodings['symbols']).fillna(-1).astype(CODE_DTYPE)
+    panel['sector_code'] = panel['symbol'].map(
+        lambda symbol: encodings['sectors'].get(sector_of(symbol), -1)).astype(CODE_DTYPE)
+    return panel.drop(columns='symbol')
+
+
+class PooledTrainer:
+    # One model for the whole universe: every symbol's rows are stacked into a panel, tagged with symbol and
+    # sector codes, and ordered by date so the held-out split is the most recent period across all symbols.
+    def __init__(self, trainer: ModelTrainer = None):
+        self.trainer = trainer or ModelTrainer()
+
+    def build_panel(self, symbols, target_column: str = "target_binary_5d", columns=None, start=None, end=None):
+        columns = None if columns is None else list(columns) + [target_column]
+        panel = self.trainer.dataset.read(symbols, columns=columns, start=start, end=end)
+        if panel.empty:
+            return None, None
+        encodings = build_encodings(panel['symbol'].unique())
+        panel = encode_panel(panel, encodings).sort_index(kind='mergesort')
+        logger.info(f"🧱 Panel of {len(panel)} rows from {len(encodings['symbols'])} symbols "
+                    f"in {len(encodings['sectors'])} sectors")
+        return panel, encodings
+
+    def train(self, symbols, target_column: str = "target_binary_5d", columns=None, start=None, end=None,
+              n_jobs: int = -1):
+        panel, encodings = self.build_panel(symbols, target_column, columns, start, end)
+        fitted = ModelTrainer.fit_model("pooled", panel, target_column, n_jobs=n_jobs)
+        if fitted is None:
+            return None
+        self.save(*fitted, encodings)
+        return fitted
+
+    def save(self, model, scaler, encodings: dict):
+        model_package = {
+            'model': model,
+            'scaler': scaler,
+            'features': list(model.feature_names_in_),
+            'encodings': encodings,
+            'created_at': datetime.now().isoformat()
+        }
+        self.trainer.registry.register(POOLED_MODEL, model_package, {'symbols': sorted(encodings['symbols'])})
+
+    def compare(self, symbols, target_column: str = "target_binary_5d") -> dict:
+        started = time.perf_counter()
+        for symbol in symbols:
+            self.trainer.train_model(symbol, target_column=target_column)
+        per_symbol_train = time.perf_counter() - started
+
+        started = time.perf_counter()
+        self.train(symbols, target_column=target_column)
+        pooled_train = time.perf_counter() - started
+
+        # Load time as the engine sees it, from a cold registry: resolve, fetch and deserialise every package.
+        started = time.perf_counter()
+        ModelRegistry(self.trainer.registry.storage).prefetch(symbols)
+        per_symbol_load = time.perf_counter() - started
+        per_symbol_bytes = sum((self.trainer.registry.metadata(symbol) or {}).get('bytes', 0) for symbol in symbols)
+
+        started = time.perf_counter()
+        ModelRegistry(self.trainer.registry.storage).load(POOLED_MODEL)
+        pooled_load = time.perf_counter() - started
+        pooled_bytes = self.trainer.registry.metadata(POOLED_MODEL)['bytes']
+
+        logger.info(f"⏱️ Training: per-symbol {per_symbol_train:.1f}s vs pooled {pooled_train:.1f}s")
+        logger.info(f"⏱️ Loading: {len(symbols)} models ({per_symbol_bytes / 1e6:.1f} MB) in "
+                    f"{per_symbol_load:.2f}s vs 1 model ({pooled_bytes / 1e6:.1f} MB) in {pooled_load:.2f}s")
+        return {'per_symbol_train_s': per_symbol_train, 'pooled_train_s': pooled_train,
+                'per_symbol_load_s': per_symbol_load, 'pooled_load_s': pooled_load,
+                'per_symbol_bytes': per_symbol_bytes, 'pooled_bytes': pooled_bytes}
@@ -5,25 +5,79 @@ import logging
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from ml_models.model_trainer import ModelTrainer
+from ml_models.training_scheduler import TrainingScheduler
+from ml_models.pooled_trainer import PooledTrainer
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def main():
+def main(serial=False, compare=False, cores=None, parallel_models=None, pooled=False, compare_pooled=False, cv=False,
+         tune=False, incremental=False, compare_incremental=False):
     stocks_to_train = [
         'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META', 'NVDA', # Tech
         'JPM', 'BAC', 'WFC', 'GS', # Financials
     ]
 
     logging.info("🚀 Starting model training session...")
-    trainer = ModelTrainer(use_azure=True)
+    if incremental or compare_incremental:
+        trainer = ModelTrainer()
+        for symbol in stocks_to_train:
+            if compare_incremental:
+                trainer.compare_incremental(symbol, target_column="target_binary_5d")
+            else:
+                trainer.retrain(symbol, target_column="target_binary_5d")
+        return
 
-    for stock in stocks_to_train:
-        logging.info(f"--- Training model for {stock} ---")
-        try:
-            trainer.train_model(symbol=stock, target_column="target_binary_5d")
-        except Exception as e:
-            logging.error(f"💥 An unexpected error occurred during training for {stock}: {e}", exc_info=True)
-        logging.info(f"--- Finished training process for {stock} ---\n")
+    if tune:
+        trainer = ModelTrainer()
+        for symbol in stocks_to_train:
+            trainer.tune(symbol, target_column="target_binary_5d", max_workers=cores)
+        return
+
+    if cv:
+        trainer = ModelTrainer()
+        for symbol in stocks_to_train:
+            trainer.cross_validate(symbol, target_column="target_binary_5d")
+        return
+
+    if pooled or compare_pooled:
+        trainer = PooledTrainer(ModelTrainer())
+        if compare_pooled:
+            trainer.compare(stocks_to_train, target_column="target_binary_5d")
+        elif trainer.train(stocks_to_train, target_column="target_binary_5d") is None:
+            logging.error("💥 Pooled training failed")
+        return
+
+    scheduler = TrainingScheduler(ModelTrainer(), cores=cores, parallel_models=parallel_models)
+
+    if compare:
+        scheduler.compare(stocks_to_train, target_column="target_binary_5d")
+    elif serial:
+        scheduler.run_serial(stocks_to_train, target_column="target_binary_5d")
+    else:
+        report = scheduler.run(stocks_to_train, target_column="target_binary_5d")
+        if report['failed']:
+            logging.error(f"💥 Training failed for: {report['failed']}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train a model per symbol")
+    parser.add_argument("--serial", action="store_true", help="Train one symbol at a time, as before")
+    parser.add_argument("--compare", action="store_true", help="Time the serial loop against the scheduler")
+    parser.add_argument("--cores", type=int, default=None, help="Core budget (default: all cores)")
+    parser.add_argument("--parallel-models", type=int, default=None, help="Models fitted at once")
+    parser.add_argument("--pooled", action="store_true", help="Train one model across all symbols")
+    parser.add_argument("--compare-pooled", action="store_true",
+                        help="Time per-symbol against pooled training and model loading")
+    parser.add_argument("--cv", action="store_true", help="Walk-forward cross-validate each symbol, no training")
+    parser.add_argument("--tune", action="store_true",
+                        help="Successive-halving search over RF/XGBoost per symbol, then train the winner")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Grow each registered model on recent rows; full rebuild when due or on drift")
+    parser.add_argument("--compare-incremental", action="store_true",
+                        help="Replay recent updates: incremental growth vs full retrain, time and accuracy")
+    args = parser.parse_args()
+
+    main(serial=args.serial, compare=args.compare, cores=args.cores, parallel_models=args.parallel_models,
+         pooled=args.pooled, compare_pooled=args.compare_pooled, cv=args.cv, tune=args.tune,
+         incremental=args.incremental, compare_incremental=args.compare_incremental)
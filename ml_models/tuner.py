@@ -0,0 +1,132 @@
+import os
+import sys
+import math
+import time
+import logging
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from xgboost import XGBClassifier
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_models.walk_forward import WalkForwardCV
+
+logger = logging.getLogger(__name__)
+
+SEARCH_SPACE = {
+    'random_forest': {
+        'max_depth': [4, 6, 10, None],
+        'min_samples_leaf': [1, 5, 20],
+        'max_features': ['sqrt', 0.5],
+        'class_weight': ['balanced', None],
+    },
+    'xgboost': {
+        'max_depth': [3, 4, 6],
+        'learning_rate': [0.03, 0.1, 0.3],
+        'subsample': [0.7, 1.0],
+        'colsample_bytree': [0.5, 0.8, 1.0],
+        'min_child_weight': [1, 5],
+    },
+}
+# Trees (RF) or boosting rounds (XGBoost) a candidate gets on the first rung; each rung multiplies it by eta.
+MIN_RESOURCE = {'random_forest': 25, 'xgboost': 50}
+EARLY_STOPPING_ROUNDS = 20
+# Share of each fold's training rows, taken from its end, that XGBoost early-stops on.
+VALIDATION_SHARE = 0.1
+
+
+def make_estimator(family: str, params: dict, n_estimators: int, n_jobs: int = 1, early_stopping: bool = False):
+    if family == 'random_forest':
+        return RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs, **params)
+    if family == 'xgboost':
+        return XGBClassifier(n_estimators=n_estimators, tree_method="hist", eval_metric="logloss",
+                             early_stopping_rounds=EARLY_STOPPING_ROUNDS if early_stopping else None,
+                             random_state=42, n_jobs=n_jobs, **params)
+    raise ValueError(f"Unknown model family: {family}")
+
+
+def _run_trial(family: str, params: dict, n_estimators: int, fold: dict, early_stopping: bool) -> tuple:
+    # (score, boosting rounds actually used) for one candidate on one walk-forward fold.
+    early_stopping = early_stopping and family == 'xgboost'
+    model = make_estimator(family, params, n_estimators, early_stopping=early_stopping)
+    X, y = fold['X_train'], fold['y_train']
+    if early_stopping:
+        cut = int(len(y) * (1 - VALIDATION_SHARE))
+        model.fit(X[:cut], y[:cut], eval_set=[(X[cut:], y[cut:])], verbose=False)
+        used = model.best_iteration + 1
+    else:
+        model.fit(X, y)
+        used = n_estimators
+
+    if len(np.unique(fold['y_test'])) == 2:
+        score = roc_auc_score(fold['y_test'], model.predict_proba(fold['X_test'])[:, 1])
+    else:
+        score = accuracy_score(fold['y_test'], model.predict(fold['X_test']))
+    return score, used
+
+
+class SuccessiveHalving:
+    # Every candidate is scored on the walk-forward folds with a small tree budget; the best 1/eta move on to
+    # the next rung with eta times the budget, until one is left. Trials run on a bounded joblib pool.
+    def __init__(self, cv: WalkForwardCV = None, n_candidates: int = 12, eta: int = 3, max_workers: int = None,
+                 early_stopping: bool = True, seed: int = 42):
+        self.cv = cv or WalkForwardCV()
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.early_stopping = early_stopping
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self) -> list:
+        # Candidates alternate between families so both get an equal share of the first rung.
+        families = list(SEARCH_SPACE)
+        candidates, seen = [], set()
+        attempts = 0
+        while len(candidates) < self.n_candidates and attempts < self.n_candidates * 20:
+            attempts += 1
+            family = families[len(candidates) % len(families)]
+            params = {name: values[self.rng.integers(len(values))] for name, values in SEARCH_SPACE[family].items()}
+            key = (family, tuple(sorted(params.items(), key=lambda item: item[0])))
+            if key not in seen:
+                seen.add(key)
+                candidates.append({'family': family, 'params': params})
+        return candidates
+
+    def search(self, df, target_column: str = "target_binary_5d") -> dict:
+        folds = self.cv.prepare(df, target_column)
+        candidates = self.sample()
+        rungs = max(math.ceil(math.log(len(candidates), self.eta)), 1)
+        trace = []
+        started = time.perf_counter()
+
+        for rung in range(rungs + 1):
+            budgets = [MIN_RESOURCE[c['family']] * self.eta ** rung for c in candidates]
+            results = Parallel(n_jobs=self.max_workers)(
+                delayed(_run_trial)(c['family'], c['params'], budget, fold, self.early_stopping)
+                for c, budget in zip(candidates, budgets) for fold in folds)
+
+            for i, candidate in enumerate(candidates):
+                scores, used = zip(*results[i * len(folds):(i + 1) * len(folds)])
+                candidate['score'] = float(np.mean(scores))
+                candidate['n_estimators'] = int(np.median(used))
+                trace.append({'rung': rung, 'family': candidate['family'], 'params': dict(candidate['params']),
+                              'budget': budgets[i], 'n_estimators': candidate['n_estimators'],
+                              'score': candidate['score'], 'fold_scores': [float(s) for s in scores]})
+            logger.info(f"🪜 Rung {rung}: {len(candidates)} candidates, best score "
+                        f"{max(c['score'] for c in candidates):.4f}")
+
+            if len(candidates) == 1:
+                break
+            candidates = sorted(candidates, key=lambda c: c['score'], reverse=True)
+            candidates = candidates[:max(len(candidates) // self.eta, 1)]
+
+        best = max(candidates, key=lambda c: c['score'])
+        elapsed = time.perf_counter() - started
+        logger.info(f"🏆 Best {best['family']} {best['params']} with {best['n_estimators']} estimators: "
+                    f"{best['score']:.4f} ({len(trace)} trials in {elapsed:.1f}s)")
+        return {'best': {'family': best['family'], 'params': best['params'],
+                         'n_estimators': best['n_estimators'], 'score': best['score']},
+                'trace': trace, 'folds': len(folds), 'elapsed': elapsed}
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logger = logging.getLogger(__name__)
+
+HORIZON = 5
+CACHE_SIZE = 4
+
+
+def walk_forward_folds(dates, n_folds: int = 5, embargo: int = HORIZON, min_train: float = 0.5) -> list:
+    # Expanding-window folds over distinct dates, so a pooled panel never splits one day across train and test.
+    # Training stops `embargo` dates before each test block: those rows' forward labels overlap the test period.
+    dates = pd.DatetimeIndex(dates)
+    unique = dates.unique().sort_values()
+    codes = unique.get_indexer(dates)
+    first_test = int(len(unique) * min_train)
+    bounds = np.linspace(first_test, len(unique), n_folds + 1).astype(int)
+
+    folds = []
+    for test_start, test_end in zip(bounds[:-1], bounds[1:]):
+        train_end = test_start - embargo
+        if train_end <= 0 or test_end <= test_start:
+            continue
+        train_idx = np.flatnonzero(codes < train_end)
+        test_idx = np.flatnonzero((codes >= test_start) & (codes < test_end))
+        folds.append((train_idx, test_idx))
+    return folds
+
+
+def drop_unlabelled_tail(df: pd.DataFrame, horizon: int = HORIZON) -> pd.DataFrame:
+    # The last `horizon` bars of each symbol have no future close, so their targets are placeholders.
+    keys = [c for c in ('symbol', 'symbol_code') if c in df.columns][:1]
+    if keys:
+        remaining = df.groupby(keys[0], sort=False).cumcount(ascending=False)
+    else:
+        remaining = pd.Series(np.arange(len(df))[::-1], index=df.index)
+    return df[remaining.to_numpy() >= horizon]
+
+
+def _fit_fold(fold: int, estimator, X_train, X_test, y_train, y_test) -> dict:
+    started = time.perf_counter()
+    model = clone(estimator).fit(X_train, y_train)
+    fit_s = time.perf_counter() - started
+    preds = model.predict(X_test)
+    row = {'fold': fold, 'train_rows': len(y_train), 'test_rows': len(y_test), 'fit_s': fit_s,
+           'accuracy': accuracy_score(y_test, preds),
+           'precision': precision_score(y_test, preds, zero_division=0),
+           'recall': recall_score(y_test, preds, zero_division=0),
+           'f1': f1_score(y_test, preds, zero_division=0),
+           'roc_auc': np.nan}
+    if len(np.unique(y_test)) == 2 and hasattr(model, 'predict_proba'):
+        row['roc_auc'] = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+    return row
+
+
+class WalkForwardCV:
+    # Fold indices and per-fold scaled matrices are built once per dataset and reused by every estimator
+    # evaluated on it, so comparing models or hyperparameters only pays for the fits. Only the last `cache_size`
+    # datasets are kept.
+    def __init__(self, n_folds: int = 5, embargo: int = HORIZON, min_train: float = 0.5, n_jobs: int = -1,
+                 cache_size: int = CACHE_SIZE):
+        self.n_folds = n_folds
+        self.embargo = embargo
+        self.min_train = min_train
+        self.n_jobs = n_jobs
+        self.cache_size = cache_size
+        self._cache = {}
+
+    def prepare(self, df: pd.DataFrame, target_column: str = "target_binary_5d", key=None) -> list:
+        # One dict per fold with float32 matrices scaled by a scaler fitted on that fold's training rows only.
+        # Keyed by content, so symbols that share a trading calendar never share folds.
+        key = key or (target_column, tuple(df.columns), int(pd.util.hash_pandas_object(df).sum()))
+        if key in self._cache:
+            self._cache[key] = self._cache.pop(key)
+            return self._cache[key]
+
+        df = drop_unlabelled_tail(df.dropna(subset=[target_column]), self.embargo)
+        X = df.drop(columns=[target_column]).select_dtypes(include=np.number).fillna(0)
+        y = df[target_column].to_numpy()
+        values = X.to_numpy(dtype=np.float32)
+
+        folds = []
+        for fold, (train_idx, test_idx) in enumerate(walk_forward_folds(df.index, self.n_folds, self.embargo,
+                                                                        self.min_train)):
+            scaler = StandardScaler().fit(values[train_idx])
+            folds.append({'fold': fold, 'features': list(X.columns),
+                          'X_train': scaler.transform(values[train_idx]).astype(np.float32),
+                          'X_test': scaler.transform(values[test_idx]).astype(np.float32),
+                          'y_train': y[train_idx], 'y_test': y[test_idx],
+                          'train_start': df.index[train_idx[0]], 'train_end': df.index[train_idx[-1]],
+                          'test_start': df.index[test_idx[0]], 'test_end': df.index[test_idx[-1]]})
+        self._cache[key] = folds
+        while len(self._cache) > self.cache_size:
+            self._cache.pop(next(iter(self._cache)))
+        logger.info(f"🗂️ Built {len(folds)} walk-forward folds over {len(df)} rows (embargo {self.embargo})")
+        return folds
+
+    def evaluate(self, estimator, df: pd.DataFrame, target_column: str = "target_binary_5d",
+                 key=None) -> pd.DataFrame:
+        folds = self.prepare(df, target_column, key)
+        estimator = clone(estimator)
+        if self.n_jobs != 1 and 'n_jobs' in estimator.get_params():
+            # Parallelism goes across folds; threads inside each fit would only oversubscribe the cores.
+            estimator.set_params(n_jobs=1)
+        rows = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_fold)(f['fold'], estimator, f['X_train'], f['X_test'], f['y_train'], f['y_test'])
+            for f in folds)
+
+        spans = pd.DataFrame([{column: f[column] for column in ('fold', 'train_start', 'train_end', 'test_start',
+                                                                'test_end')} for f in folds])
+        table = spans.set_index('fold').join(pd.DataFrame(rows).set_index('fold'))
+        logger.info(f"📊 Walk-forward accuracy {table['accuracy'].mean():.4f} ± {table['accuracy'].std():.4f} "
+                    f"over {len(table)} folds")
+        return table
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The packages are imported from the repository root, as the scripts do with their own sys.path entries.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# config.settings requires Azure credentials unless storage is local.
+os.environ.setdefault("STORAGE_BACKEND", "local")
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from trading_engine.backtester import Backtester, replay_loop, synthetic_universe
+
+
+def test_unaffordable_buy_does_not_shrink_later_orders(tmp_path):
+    # Three BUYs on one bar; the middle symbol costs more than its share of the cash.
+    dates = pd.bdate_range("2024-01-02", periods=2, name="Date")
+    prices = pd.DataFrame({'AAA': [10.0, 10.0], 'BBB': [1e6, 1e6], 'CCC': [10.0, 10.0]}, index=dates)
+    predictions = pd.DataFrame({'symbol': ['AAA', 'BBB', 'CCC'], 'prediction': 1, 'confidence': 0.9},
+                               index=dates[:1].repeat(3))
+    result = Backtester(100000, results_dir=str(tmp_path)).run(predictions, prices)
+    bought = result['trades'].set_index('symbol')['quantity']
+    assert bought.to_dict() == {'AAA': 500, 'CCC': 475}
+    assert (result['equity']['equity'] == replay_loop(predictions, prices)).all()
+
+
+def test_matches_replay_loop_with_unaffordable_symbols(tmp_path):
+    predictions, prices = synthetic_universe(40, 2)
+    prices.iloc[:, ::4] *= 40
+    equity = Backtester(100000, results_dir=str(tmp_path)).run(predictions, prices)['equity']['equity']
+    reference = replay_loop(predictions, prices)
+    assert ((equity - reference).abs() / reference).max() < 0.005
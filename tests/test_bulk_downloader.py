@@ -0,0 +1,137 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_collection.bulk_downloader import BulkDownloader, StubSource, TokenBucket
+from data_collection.price_store import PriceStore, PRICE_COLUMNS
+
+
+def make_frames(symbols, n_bars=30):
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2024-01-01", periods=n_bars, name="Date")
+    frames = {}
+    for symbol in symbols:
+        close = 100 + rng.normal(size=n_bars).cumsum()
+        frames[symbol] = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                                       'Volume': rng.integers(1000, 5000, n_bars).astype(float)}, index=index)
+    return frames
+
+
+class RecordingSource(StubSource):
+    def __init__(self, frames, **kwargs):
+        super().__init__(frames, **kwargs)
+        self.requested = []
+
+    def fetch(self, symbols, period=None, start=None, end=None) -> dict:
+        with self.lock:
+            self.requested.append(list(symbols))
+        return super().fetch(symbols, period=period, start=start, end=end)
+
+
+def make_downloader(source, store, **kwargs):
+    options = {'batch_size': 10, 'max_workers': 4, 'requests_per_second': 1000.0, 'burst': 100, 'backoff': 0.0}
+    options.update(kwargs)
+    return BulkDownloader(source, store, **options)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / "prices"))
+
+
+def test_symbols_are_fetched_in_batches(store):
+    symbols = [f"SYM{i:02d}" for i in range(25)]
+    source = RecordingSource(make_frames(symbols))
+
+    report = make_downloader(source, store, batch_size=10).download(symbols)
+
+    assert sorted(len(batch) for batch in source.requested) == [5, 10, 10]
+    assert sorted(s for batch in source.requested for s in batch) == symbols
+    assert report['requests'] == 3
+    assert report['failed'] == []
+
+
+def test_token_bucket_limits_request_rate():
+    bucket = TokenBucket(rate=20.0, capacity=1)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # The first token is already in the bucket; the other four each wait 1/20 s.
+    assert time.monotonic() - started >= 4 / 20 * 0.9
+
+
+def test_downloader_requests_respect_rate_limit(store):
+    symbols = [f"SYM{i}" for i in range(6)]
+    downloader = make_downloader(StubSource(make_frames(symbols)), store, batch_size=1, requests_per_second=20.0,
+                                 burst=1)
+
+    report = downloader.download(symbols)
+
+    assert report['requests'] == 6
+    assert report['elapsed'] >= 5 / 20 * 0.9
+
+
+def test_failed_batch_is_retried(store):
+    symbols = ["AAA", "BBB"]
+    source = StubSource(make_frames(symbols), fail_first=2)
+
+    report = make_downloader(source, store, max_retries=4).download(symbols)
+
+    assert source.calls == 3
+    assert report['requests'] == 3
+    assert report['failed'] == []
+    assert sorted(report['rows']) == symbols
+
+
+def test_batch_failing_every_retry_marks_its_symbols_failed(store):
+    symbols = ["AAA", "BBB"]
+    source = StubSource(make_frames(symbols), fail_first=100)
+
+    report = make_downloader(source, store, max_retries=2).download(symbols)
+
+    assert source.calls == 3
+    assert sorted(report['failed']) == symbols
+    assert report['rows'] == {}
+    assert store.symbols() == []
+
+
+def test_partial_failure_is_reported_per_symbol(store):
+    frames = make_frames(["AAA", "CCC"])
+    source = RecordingSource(frames)
+
+    report = make_downloader(source, store, max_retries=2).download(["AAA", "BBB", "CCC"])
+
+    assert report['failed'] == ["BBB"]
+    assert report['rows'] == {'AAA': 30, 'CCC': 30}
+    # The missing symbol is retried on its own, not with the whole batch.
+    assert source.requested == [["AAA", "BBB", "CCC"], ["BBB"], ["BBB"]]
+
+
+def test_each_symbol_is_written_to_the_price_store(store):
+    frames = make_frames(["AAA", "BBB", "CCC"])
+    frames["AAA"]["Dividends"] = 0.0
+
+    make_downloader(StubSource(frames), store, batch_size=2).download(list(frames))
+
+    assert store.symbols() == ["AAA", "BBB", "CCC"]
+    for symbol, frame in frames.items():
+        stored = store.read(symbol)
+        assert list(stored.columns) == PRICE_COLUMNS
+        np.testing.assert_allclose(stored.to_numpy(), frame[PRICE_COLUMNS].to_numpy())
+        assert (stored.index == frame.index).all()
+        assert store.last_timestamp(symbol) == frame.index[-1]
+
+
+def test_catalog_is_written_once_per_batch(store, monkeypatch):
+    symbols = [f"SYM{i:02d}" for i in range(25)]
+    store.write("SEED", make_frames(["SEED"])["SEED"])
+    writes = []
+    write_catalog = store._write_catalog
+    monkeypatch.setattr(store, '_write_catalog', lambda entries: writes.append(len(entries)) or write_catalog(entries))
+
+    make_downloader(StubSource(make_frames(symbols)), store, batch_size=10).download(symbols)
+
+    assert len(writes) == 3
+    assert store.symbols() == ["SEED"] + symbols
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from ml_models.compiled_forest import compile_forest
+
+
+def boundary_frame(n_rows=3000, seed=0):
+    # Features whose values repeat exactly, so many rows sit on a split threshold: flags, rounded RSI-like
+    # oscillators, whole-share volumes and float32 prices.
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({'flag': rng.integers(0, 2, n_rows), 'regime': rng.integers(-1, 2, n_rows),
+                      'rsi': np.round(rng.uniform(0, 100, n_rows), 1),
+                      'volume': rng.integers(1, 200, n_rows) * 1e5,
+                      'close': np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_rows))), 2),
+                      'noise': rng.normal(size=n_rows)}).astype(np.float32)
+    y = ((X['rsi'] > 50) ^ (X['flag'] > 0) ^ (rng.uniform(size=n_rows) < 0.2)).astype(int)
+    return X, y
+
+
+def make_model(family):
+    if family == 'random_forest':
+        return RandomForestClassifier(n_estimators=50, max_depth=10, class_weight="balanced", random_state=42)
+    xgboost = pytest.importorskip("xgboost")
+    return xgboost.XGBClassifier(n_estimators=100, max_depth=4, tree_method="hist", random_state=42)
+
+
+@pytest.mark.parametrize("family", ['random_forest', 'xgboost'])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_compiled_matches_model_on_boundary_rows(family, dtype):
+    X, y = boundary_frame()
+    scaler = StandardScaler().set_output(transform="pandas").fit(X)
+    model = make_model(family)
+    model.fit(scaler.transform(X), y)
+    X = X.astype(dtype)
+
+    labels, proba = compile_forest(model, scaler).predict_with_proba(X)
+    scaled = scaler.transform(X)
+    assert np.array_equal(labels, model.predict(scaled))
+    assert np.abs(proba - model.predict_proba(scaled)).max() < 1e-6
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_collection.indicators import (INDICATOR_COLUMNS, check_parity, compute_indicators, compute_panel,
+                                        synthetic_ohlcv)
+from data_collection.streaming_indicators import LiveFeatureState
+
+RTOL = ATOL = 1e-7
+EPS = np.finfo(float).eps
+
+
+# pandas_ta's formulas (0.3.14b defaults) written out with plain pandas, so parity is checked even where
+# pandas_ta isn't installed.
+def _non_zero_range(a, b):
+    diff = a - b
+    if diff.eq(0).any():
+        diff = diff + EPS
+    return diff
+
+
+def _sma(x, length):
+    return x.rolling(length, min_periods=length).mean()
+
+
+def _ema(x, length):
+    # Seeded with the SMA of the first `length` values, starting from the first valid one.
+    x = x.loc[x.first_valid_index():].copy()
+    seed = x.iloc[:length].mean()
+    x.iloc[:length - 1] = np.nan
+    x.iloc[length - 1] = seed
+    return x.ewm(span=length, adjust=False).mean()
+
+
+def _rma(x, length):
+    return x.ewm(alpha=1.0 / length, min_periods=length).mean()
+
+
+def _true_range(high, low, close):
+    prev_close = close.shift(1)
+    ranges = pd.concat([_non_zero_range(high, low), high - prev_close, prev_close - low], axis=1)
+    tr = ranges.abs().max(axis=1)
+    tr.iloc[:1] = np.nan
+    return tr
+
+
+def pandas_reference(df: pd.DataFrame) -> pd.DataFrame:
+    high, low, close, volume = df['High'], df['Low'], df['Close'], df['Volume']
+    out = {'SMA_20': _sma(close, 20), 'SMA_50': _sma(close, 50), 'EMA_12': _ema(close, 12),
+           'EMA_26': _ema(close, 26)}
+
+    change = close.diff()
+    positive, negative = change.copy(), change.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    positive_avg, negative_avg = _rma(positive, 14), _rma(negative, 14)
+    out['RSI_14'] = 100 * positive_avg / (positive_avg + negative_avg.abs())
+
+    line = _ema(close, 12) - _ema(close, 26)
+    signal = _ema(line, 9).reindex(close.index)
+    out.update({'MACD_12_26_9': line, 'MACDh_12_26_9': line - signal, 'MACDs_12_26_9': signal})
+
+    mid = _sma(close, 5)
+    deviation = close.rolling(5).std(ddof=0)
+    lower, upper = mid - 2 * deviation, mid + 2 * deviation
+    span = _non_zero_range(upper, lower)
+    out.update({'BBL_5_2.0': lower, 'BBM_5_2.0': mid, 'BBU_5_2.0': upper, 'BBB_5_2.0': 100 * span / mid,
+                'BBP_5_2.0': _non_zero_range(close, lower) / span})
+
+    atr = _rma(_true_range(high, low, close), 14)
+    out['ATRr_14'] = atr
+
+    sign = close.diff()
+    sign[sign > 0] = 1
+    sign[sign < 0] = -1
+    sign.iloc[0] = 1
+    out['OBV'] = (sign * volume).cumsum()
+
+    up, dn = high - high.shift(1), low.shift(1) - low
+    pos = (((up > dn) & (up > 0)) * up).apply(lambda x: 0 if abs(x) < EPS else x)
+    neg = (((dn > up) & (dn > 0)) * dn).apply(lambda x: 0 if abs(x) < EPS else x)
+    k = 100 / atr
+    dmp, dmn = k * _rma(pos, 14), k * _rma(neg, 14)
+    out.update({'ADX_14': _rma(100 * (dmp - dmn).abs() / (dmp + dmn), 14), 'DMP_14': dmp, 'DMN_14': dmn})
+
+    typical = (high + low + close) / 3
+    mad = typical.rolling(14).apply(lambda w: np.abs(w - w.mean()).mean(), raw=True)
+    out['CCI_14_0.015'] = (typical - _sma(typical, 14)) / (0.015 * mad)
+
+    lowest, highest = low.rolling(14).min(), high.rolling(14).max()
+    raw = 100 * (close - lowest) / _non_zero_range(highest, lowest)
+    stoch_k = _sma(raw.loc[raw.first_valid_index():], 3)
+    stoch_d = _sma(stoch_k.loc[stoch_k.first_valid_index():], 3)
+    out.update({'STOCHk_14_3_3': stoch_k, 'STOCHd_14_3_3': stoch_d})
+
+    return pd.DataFrame(out, index=df.index)[INDICATOR_COLUMNS]
+
+
+def sample_frame(n_bars=504, seed=42) -> pd.DataFrame:
+    data = synthetic_ohlcv(n_bars, 1, seed)
+    return pd.DataFrame({c: v[:, 0] for c, v in data.items()}, index=pd.bdate_range("2023-01-02", periods=n_bars))
+
+
+def flat_frame() -> pd.DataFrame:
+    # Twenty bars with open = high = low = close: the stochastic's and Bollinger bands' ranges hit zero.
+    df = sample_frame(200)
+    flat = slice(100, 120)
+    for column in ('Open', 'High', 'Low', 'Close'):
+        df.iloc[flat, df.columns.get_loc(column)] = 100.0
+    return df
+
+
+def mismatches(actual: pd.DataFrame, expected: pd.DataFrame) -> dict:
+    failed = {}
+    for column in INDICATOR_COLUMNS:
+        a, b = actual[column].to_numpy(dtype=np.float64), expected[column].to_numpy(dtype=np.float64)
+        if not np.allclose(a, b, rtol=RTOL, atol=ATOL, equal_nan=True):
+            failed[column] = float(np.nanmax(np.abs(a - b)))
+    return failed
+
+
+@pytest.mark.parametrize("make_frame", [sample_frame, flat_frame], ids=["random_walk", "zero_range"])
+def test_kernels_match_pandas_reference(make_frame):
+    df = make_frame()
+    assert mismatches(compute_indicators(df), pandas_reference(df)) == {}
+
+
+@pytest.mark.parametrize("make_frame", [sample_frame, flat_frame], ids=["random_walk", "zero_range"])
+def test_kernels_match_pandas_ta(make_frame):
+    pytest.importorskip("pandas_ta")
+    assert check_parity(make_frame(), rtol=RTOL, atol=ATOL) == {}
+
+
+def test_zero_range_bars_stay_finite():
+    df = flat_frame()
+    native = compute_indicators(df)
+    # Rows whose whole window lies inside the flat stretch (bars 100-119): 14 bars plus 3 of smoothing for the
+    # stochastic, 5 bars for the bands. pandas_ta gives 0 and 1 there rather than NaN.
+    assert (native['STOCHk_14_3_3'].iloc[115:120] == 0).all()
+    assert (native['BBP_5_2.0'].iloc[104:120] == 1).all()
+    assert np.isfinite(native['BBB_5_2.0'].iloc[104:120]).all()
+
+
+def test_panel_matches_per_symbol():
+    data = synthetic_ohlcv(300, 4)
+    index = pd.bdate_range("2023-01-02", periods=300)
+    panel = compute_panel(data['Open'], data['High'], data['Low'], data['Close'], data['Volume'])
+    for j in range(4):
+        single = compute_indicators(pd.DataFrame({c: v[:, j] for c, v in data.items()}, index=index))
+        assert mismatches(pd.DataFrame({c: v[:, j] for c, v in panel.items()}, index=index), single) == {}
+
+
+@pytest.mark.parametrize("make_frame", [sample_frame, flat_frame], ids=["random_walk", "zero_range"])
+def test_streaming_matches_batch(make_frame):
+    df = make_frame(300) if make_frame is sample_frame else make_frame()
+    state = LiveFeatureState()
+    rows = [dict(state.update(timestamp, *bar)) for timestamp, bar in
+            zip(df.index, df[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(dtype=np.float64))]
+    assert mismatches(pd.DataFrame(rows, index=df.index), compute_indicators(df)) == {}
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_collection.storage import LocalBlobStore
+from ml_models.model_registry import ModelRegistry
+from ml_models.model_trainer import ModelTrainer
+
+TUNING = {'best': {'family': 'xgboost', 'params': {'max_depth': 3, 'learning_rate': 0.1}, 'n_estimators': 30}}
+
+
+def feature_frame(n_bars=400, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2022-01-03", periods=n_bars, name="Date")
+    features = pd.DataFrame(rng.normal(size=(n_bars, 3)), index=index, columns=['f1', 'f2', 'f3'])
+    features['target_binary_5d'] = (features['f1'] + rng.normal(scale=0.5, size=n_bars) > 0).astype(int)
+    return features
+
+
+@pytest.fixture
+def trainer(tmp_path):
+    trainer = ModelTrainer(ModelRegistry(LocalBlobStore(str(tmp_path / "blobs")), mmap_dir=str(tmp_path / "mmap")))
+    frames = {'AAA': feature_frame()}
+
+    def load_features(symbol, columns=None, start=None, end=None):
+        df = frames.get(symbol)
+        if df is None:
+            return None
+        df = df.loc[start:end]
+        return df if columns is None else df[columns]
+
+    trainer._load_features = load_features
+    trainer.frames = frames
+    return trainer
+
+
+def test_full_rebuild_keeps_the_tuned_estimator(trainer):
+    df = trainer.frames['AAA']
+    model, scaler = trainer.fit_model('AAA', df, model=trainer.rebuild_estimator({'tuning': TUNING}))
+    trainer._save_model('AAA', model, scaler, tuning=TUNING, metadata=trainer.training_window(df))
+
+    report = trainer.retrain('AAA', force_full=True)
+    assert report['mode'] == 'full'
+    rebuilt = trainer.registry.load_full('AAA')
+    assert type(rebuilt['model']).__name__ == 'XGBClassifier'
+    assert rebuilt['model'].get_params()['max_depth'] == 3
+    assert rebuilt['tuning'] == TUNING
+
+
+def test_failed_full_rebuild_is_not_reported(trainer):
+    assert trainer.retrain('MISSING') is None
+    assert trainer.registry.latest_version('MISSING') is None
+
+
+def test_one_class_window_falls_back_to_full_rebuild(trainer):
+    df = trainer.frames['AAA']
+    trainer.train_model('AAA', end=df.index[299])
+    grown = df.copy()
+    grown.iloc[:, grown.columns.get_loc('target_binary_5d')] = np.where(np.arange(len(df)) < 100,
+                                                                        grown['target_binary_5d'], 1)
+    trainer.frames['AAA'] = grown
+
+    report = trainer.retrain('AAA')
+    assert report['mode'] == 'full'
+    assert report['reason'].startswith('recent rows missing class')
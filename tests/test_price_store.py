@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from data_collection.price_store import PriceStore, PRICE_COLUMNS
+
+
+def bars(n_bars=250, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Volume': rng.integers(1e5, 1e7, n_bars).astype(float)},
+                        index=pd.bdate_range("2023-01-02", periods=n_bars, name="Date"))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / "prices"))
+
+
+def test_reads_are_float32_and_zero_copy(store):
+    frames = {symbol: bars(seed=seed) for seed, symbol in enumerate(["AAA", "BBB"])}
+    for symbol, frame in frames.items():
+        store.write(symbol, frame)
+
+    allocated = pa.total_allocated_bytes()
+    data = store.read_many(columns=PRICE_COLUMNS)
+    assert pa.total_allocated_bytes() == allocated
+    for symbol, frame in frames.items():
+        assert (data[symbol].dtypes == np.float32).all()
+        assert not any(data[symbol][column].to_numpy().flags.owndata for column in PRICE_COLUMNS)
+        np.testing.assert_allclose(data[symbol].to_numpy(), frame.to_numpy(), rtol=1e-6)
+
+
+def test_failed_write_keeps_earlier_files_in_the_catalog(store):
+    frames = {'AAA': bars(), 'BAD': bars(), 'CCC': bars(seed=2)}
+    frames['BAD'].index = [f"day {i}" for i in range(len(frames['BAD']))]
+
+    with pytest.raises(Exception):
+        store.write_many(frames)
+    assert store.symbols() == ['AAA']
+    assert store.catalog()['AAA']['rows'] == len(frames['AAA'])
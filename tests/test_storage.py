@@ -0,0 +1,93 @@
+import json
+import os
+import multiprocessing
+
+import pytest
+
+from data_collection.storage import CachedStorage, LocalBlobStore
+
+
+def cache_files(root):
+    return {f for f in os.listdir(root) if not f.startswith(".") and f not in ("index.json", "index.lock")}
+
+
+def index_entries(root):
+    with open(os.path.join(root, "index.json")) as f:
+        return dict(json.load(f)["entries"])
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return LocalBlobStore(str(tmp_path / "blobs"))
+
+
+def test_index_keeps_entries_added_by_other_processes(backend, tmp_path):
+    root = str(tmp_path / "cache")
+    first, second = CachedStorage(backend, root), CachedStorage(backend, root)
+
+    first.put("a", b"1" * 10)
+    second.put("b", b"2" * 10)
+    first.put("c", b"3" * 10)
+
+    assert set(index_entries(root)) == {"market-data/a", "market-data/b", "market-data/c"}
+    assert cache_files(root) == {entry['file'] for entry in index_entries(root).values()}
+
+
+def test_size_bound_covers_every_process(backend, tmp_path):
+    root = str(tmp_path / "cache")
+    first, second = CachedStorage(backend, root, max_bytes=25), CachedStorage(backend, root, max_bytes=25)
+
+    for i in range(4):
+        (first if i % 2 else second).put(f"blob{i}", bytes(10))
+
+    entries = index_entries(root)
+    assert sum(entry['size'] for entry in entries.values()) <= 25
+    assert set(entries) == {"market-data/blob2", "market-data/blob3"}
+    assert cache_files(root) == {entry['file'] for entry in entries.values()}
+
+
+def test_stale_index_never_serves_replaced_content(backend, tmp_path):
+    root = str(tmp_path / "cache")
+    first, second = CachedStorage(backend, root), CachedStorage(backend, root)
+
+    first.put("shared", b"old")
+    assert second.get("shared") == b"old"
+    first.put("shared", b"new")
+
+    assert second.get("shared") == b"new"
+    assert len(cache_files(root)) == 1
+
+
+def test_recent_reads_survive_another_process_saving(backend, tmp_path):
+    root = str(tmp_path / "cache")
+    first, second = CachedStorage(backend, root, max_bytes=30), CachedStorage(backend, root, max_bytes=30)
+    for name in ("a", "b", "c"):
+        first.put(name, bytes(10))
+
+    assert second.get("a") == bytes(10)
+    second.put("d", bytes(10))
+
+    # "a" was read after "b" and "c" were cached, so "b" is the least recently used.
+    assert set(index_entries(root)) == {"market-data/a", "market-data/c", "market-data/d"}
+
+
+def _worker(blob_root, cache_root, worker):
+    cache = CachedStorage(LocalBlobStore(blob_root), cache_root, max_bytes=2000)
+    for i in range(25):
+        cache.put(f"w{worker}/blob{i}", bytes(100))
+        cache.get(f"w{(worker + 1) % 4}/blob{i}")
+
+
+def test_concurrent_processes_keep_index_and_files_consistent(backend, tmp_path):
+    root = str(tmp_path / "cache")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_worker, args=(backend.root, root, w)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    entries = index_entries(root)
+    assert sum(entry['size'] for entry in entries.values()) <= 2000
+    assert cache_files(root) == {entry['file'] for entry in entries.values()}
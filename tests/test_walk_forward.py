@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from ml_models.walk_forward import WalkForwardCV
+
+
+def symbol_frame(seed, n_bars=300):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2022-01-03", periods=n_bars, name="Date")
+    return pd.DataFrame({'feature_a': rng.normal(size=n_bars), 'feature_b': rng.normal(size=n_bars),
+                         'target_binary_5d': rng.integers(0, 2, n_bars)}, index=index)
+
+
+def test_same_calendar_frames_get_their_own_folds():
+    cv = WalkForwardCV(n_folds=3, n_jobs=1)
+    first, second = cv.prepare(symbol_frame(0)), cv.prepare(symbol_frame(1))
+    assert len(first) == len(second) == 3
+    for a, b in zip(first, second):
+        assert not np.array_equal(a['X_train'], b['X_train'])
+        assert not np.array_equal(a['y_test'], b['y_test'])
+    assert cv.prepare(symbol_frame(0)) is first
+
+
+def test_cache_keeps_only_recent_frames():
+    cv = WalkForwardCV(n_folds=2, n_jobs=1, cache_size=2)
+    for seed in range(5):
+        cv.prepare(symbol_frame(seed))
+    assert len(cv._cache) == 2
@@ -0,0 +1,317 @@
+import os
+import sys
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config.settings import config
+from data_collection.price_store import PriceStore
+from ml_models.model_trainer import ModelTrainer
+from ml_models.pooled_trainer import PooledTrainer
+from ml_models.walk_forward import HORIZON, walk_forward_folds, drop_unlabelled_tail
+from trading_engine.paper_trader import PaperTradingEngine, CONFIDENCE_THRESHOLD, POSITION_SIZE
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = "backtest_results"
+PREDICTIONS_FILE = "oos_predictions.parquet"
+TRADING_DAYS = 252
+
+
+def _fold_predictions(estimator, X_train, y_train, X_test) -> tuple:
+    scaler = StandardScaler().fit(X_train)
+    model = clone(estimator).fit(scaler.transform(X_train), y_train)
+    proba = model.predict_proba(scaler.transform(X_test))
+    return model.classes_[proba.argmax(axis=1)], proba.max(axis=1)
+
+
+def walk_forward_predictions(df: pd.DataFrame, target_column: str = "target_binary_5d", estimator=None,
+                             n_folds: int = 5, embargo: int = HORIZON, min_train: float = 0.5,
+                             n_jobs: int = -1) -> pd.DataFrame:
+    # Every test block is scored by a model fitted only on dates before it, less the embargo, so each prediction is
+    # out of sample. Dates before the first test block get none. Test rows keep their unlabelled tail; training
+    # rows don't.
+    df = df.dropna(subset=[target_column])
+    labelled = np.zeros(len(df), dtype=bool)
+    labelled[drop_unlabelled_tail(df.assign(_row=np.arange(len(df))))['_row'].to_numpy()] = True
+    X = df.drop(columns=[target_column]).select_dtypes(include=np.number).fillna(0).to_numpy(dtype=np.float32)
+    y = df[target_column].to_numpy()
+
+    estimator = clone(estimator if estimator is not None else ModelTrainer.build_model())
+    if n_jobs != 1 and 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=1)
+    folds = [(train_idx[labelled[train_idx]], test_idx)
+             for train_idx, test_idx in walk_forward_folds(df.index, n_folds, embargo, min_train)]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fold_predictions)(estimator, X[train_idx], y[train_idx], X[test_idx]) for train_idx, test_idx in folds)
+    if not results:
+        return pd.DataFrame(columns=['prediction', 'confidence'], index=df.index[:0])
+
+    # A pooled panel keeps its symbol codes, to tell the symbols' rows apart.
+    scored = df.iloc[np.concatenate([test_idx for _, test_idx in folds])]
+    return scored[[c for c in ('symbol_code',) if c in df.columns]].assign(
+        prediction=np.concatenate([labels for labels, _ in results]),
+        confidence=np.concatenate([confidence for _, confidence in results]))
+
+
+class Backtester:
+    # Replays the price history in local_data_cache across the whole universe with the paper trader's rules, acting
+    # on precomputed out-of-sample predictions. Positions, cost basis and cash are NumPy arrays over symbols, so each
+    # bar is a handful of array operations however many symbols there are; only the walk over bars is a loop, as
+    # every bar's cash depends on the one before.
+    def __init__(self, initial_capital=100000, local_data_dir="local_data_cache", results_dir=RESULTS_DIR,
+                 threshold=CONFIDENCE_THRESHOLD, position_size=POSITION_SIZE):
+        self.initial_capital = initial_capital
+        self.price_store = PriceStore(local_data_dir)
+        self.results_dir = results_dir
+        self.threshold = threshold
+        self.position_size = position_size
+
+    def load_prices(self, symbols=None) -> pd.DataFrame:
+        # Closes as a dates x symbols frame; NaN where a symbol has no bar.
+        data = self.price_store.read_many(symbols, columns=["Close"])
+        if not data:
+            return pd.DataFrame()
+        prices = pd.concat({symbol: df['Close'] for symbol, df in data.items()}, axis=1).sort_index()
+        logger.info(f"📈 Loaded {len(prices)} bars for {prices.shape[1]} symbols "
+                    f"({prices.index[0]:%Y-%m-%d} to {prices.index[-1]:%Y-%m-%d})")
+        return prices.astype(np.float64)
+
+    def predict(self, symbols=None, target_column: str = "target_binary_5d", mode: str = None, n_folds: int = 5,
+                trainer: ModelTrainer = None, n_jobs: int = -1) -> pd.DataFrame:
+        # Out-of-sample predictions for every symbol, long format (date index; symbol, prediction, confidence),
+        # cached so backtests don't refit anything.
+        trainer = trainer or ModelTrainer()
+        mode = mode or config.model_mode
+        symbols = sorted(symbols or set(self.price_store.symbols()) & set(trainer.dataset.symbols()))
+        started = time.perf_counter()
+
+        frames = []
+        if mode == "pooled":
+            panel, encodings = PooledTrainer(trainer).build_panel(symbols, target_column)
+            if panel is not None:
+                predictions = walk_forward_predictions(panel, target_column, n_folds=n_folds, n_jobs=n_jobs)
+                codes = {code: symbol for symbol, code in encodings['symbols'].items()}
+                frames.append(predictions.assign(symbol=predictions.pop('symbol_code').map(codes)))
+        else:
+            for symbol in symbols:
+                df = trainer._load_features(symbol)
+                if df is None or df.empty or target_column not in df.columns:
+                    logger.warning(f"⚠️ No features with '{target_column}' for {symbol}. Skipping.")
+                    continue
+                frames.append(walk_forward_predictions(df, target_column, n_folds=n_folds, n_jobs=n_jobs)
+                              .assign(symbol=symbol))
+
+        if not frames:
+            logger.error("No out-of-sample predictions could be made")
+            return None
+        predictions = pd.concat(frames)[['symbol', 'prediction', 'confidence']]
+        predictions.index.name = predictions.index.name or "Date"
+        os.makedirs(self.results_dir, exist_ok=True)
+        predictions.to_parquet(os.path.join(self.results_dir, PREDICTIONS_FILE))
+        logger.info(f"🔮 {len(predictions)} out-of-sample predictions for {predictions['symbol'].nunique()} symbols "
+                    f"in {time.perf_counter() - started:.1f}s ({mode})")
+        return predictions
+
+    def load_predictions(self) -> pd.DataFrame:
+        path = os.path.join(self.results_dir, PREDICTIONS_FILE)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
+
+    def signals(self, predictions: pd.DataFrame, prices: pd.DataFrame) -> tuple:
+        # BUY and SELL masks on the price grid, by the same rule as PaperTradingEngine._decide. No prediction or no
+        # bar means HOLD.
+        wide = predictions.pivot_table(index=predictions.index, columns='symbol',
+                                       values=['prediction', 'confidence'], aggfunc='last')
+        label = wide['prediction'].reindex(index=prices.index, columns=prices.columns).to_numpy()
+        confidence = wide['confidence'].reindex(index=prices.index, columns=prices.columns).to_numpy()
+        acting = (confidence >= self.threshold) & ~np.isnan(prices.to_numpy())
+        return acting & (label == 1), acting & (label != 1) & ~np.isnan(label)
+
+    def run(self, predictions: pd.DataFrame, prices: pd.DataFrame = None) -> dict:
+        started = time.perf_counter()
+        prices = self.load_prices(sorted(predictions['symbol'].unique())) if prices is None else prices
+        buy, sell = self.signals(predictions, prices)
+        close = prices.to_numpy(dtype=np.float64)
+        # Held positions are marked at their last known close through gaps.
+        mark = prices.ffill().fillna(0.0).to_numpy(dtype=np.float64)
+        n_bars, n_symbols = close.shape
+
+        shares = np.zeros(n_symbols)
+        cost = np.zeros(n_symbols)
+        cash = float(self.initial_capital)
+        curve = np.empty((n_bars, 3))
+        fills = []
+        # Buys within a bar each take POSITION_SIZE of the cash left by the previous one, as the paper trader's
+        # sequential execute_trade calls do; ignoring whole-share rounding the k-th fill gets size * (1 - size)^k.
+        keep = 1.0 - self.position_size
+
+        for t in range(n_bars):
+            # Fills are at the bar's close, the price the prediction was made from. Sells go first, so their
+            # proceeds are available to the bar's buys.
+            sells = np.flatnonzero(sell[t] & (shares > 0))
+            if len(sells):
+                price = close[t, sells]
+                cash += shares[sells] @ price
+                fills.append((t, sells, -shares[sells], price, (price - cost[sells]) * shares[sells]))
+                shares[sells] = 0
+
+            buys = np.flatnonzero(buy[t] & (shares == 0))
+            if len(buys):
+                price = close[t, buys]
+                budget = cash * self.position_size
+                # An order too small for one share is skipped without taking a slot, so each order's k counts
+                # only the fills before it. Every pass settles at least the next order in line.
+                filled = np.ones(len(buys), dtype=bool)
+                while True:
+                    quantity = np.floor(budget * keep ** (np.cumsum(filled) - filled) / price)
+                    if np.array_equal(quantity > 0, filled):
+                        break
+                    filled = quantity > 0
+                buys, price, quantity = buys[filled], price[filled], quantity[filled]
+                cash -= quantity @ price
+                shares[buys] = quantity
+                cost[buys] = price
+                fills.append((t, buys, quantity, price, np.full(len(buys), np.nan)))
+
+            curve[t] = cash, shares @ mark[t], np.count_nonzero(shares)
+
+        equity = pd.DataFrame(curve, index=prices.index, columns=['cash', 'holdings', 'positions'])
+        equity['positions'] = equity['positions'].astype(int)
+        equity.insert(2, 'equity', equity['cash'] + equity['holdings'])
+        equity['returns'] = equity['equity'].pct_change().fillna(0.0)
+        trades = self._trade_list(fills, prices)
+        elapsed = time.perf_counter() - started
+
+        summary = self.summarize(equity, trades)
+        summary['elapsed'] = elapsed
+        logger.info(f"🧪 Backtest over {n_bars} bars x {n_symbols} symbols in {elapsed:.2f}s: "
+                    f"{summary['total_return']:+.2f}% return, {summary['max_drawdown']:.2f}% max drawdown, "
+                    f"{summary['trades']} trades")
+        return {'equity': equity, 'trades': trades, 'summary': summary}
+
+    @staticmethod
+    def _trade_list(fills: list, prices: pd.DataFrame) -> pd.DataFrame:
+        # Same fields as the paper trader's trade_history.
+        columns = ['timestamp', 'symbol', 'action', 'quantity', 'price', 'profit']
+        if not fills:
+            return pd.DataFrame(columns=columns)
+        bars, symbols, quantity, price, profit = (np.concatenate(parts) for parts in
+                                                  zip(*((np.full(len(s), t), s, q, p, pl)
+                                                        for t, s, q, p, pl in fills)))
+        return pd.DataFrame({'timestamp': prices.index.to_numpy()[bars],
+                             'symbol': prices.columns.to_numpy()[symbols],
+                             'action': np.where(quantity > 0, 'BUY', 'SELL'), 'quantity': np.abs(quantity).astype(int),
+                             'price': price, 'profit': profit}, columns=columns)
+
+    def summarize(self, equity: pd.DataFrame, trades: pd.DataFrame) -> dict:
+        values = equity['equity']
+        returns = equity['returns']
+        closed = trades.loc[trades['action'] == 'SELL', 'profit']
+        years = len(values) / TRADING_DAYS
+        return {'final_value': float(values.iloc[-1]),
+                'total_return': (values.iloc[-1] / self.initial_capital - 1) * 100,
+                'annual_return': ((values.iloc[-1] / self.initial_capital) ** (1 / years) - 1) * 100 if years else 0.0,
+                'sharpe': float(returns.mean() / returns.std() * np.sqrt(TRADING_DAYS)) if returns.std() else 0.0,
+                'max_drawdown': float((values / values.cummax() - 1).min() * 100),
+                'trades': len(trades),
+                'win_rate': float((closed > 0).mean() * 100) if len(closed) else 0.0,
+                'exposure': float((equity['holdings'] / values).mean() * 100)}
+
+    def save(self, result: dict):
+        os.makedirs(self.results_dir, exist_ok=True)
+        result['equity'].to_csv(os.path.join(self.results_dir, "equity_curve.csv"))
+        result['trades'].to_csv(os.path.join(self.results_dir, "trades.csv"), index=False)
+        logger.info(f"💾 Equity curve and {len(result['trades'])} trades written to {self.results_dir}/")
+
+
+def replay_loop(predictions: pd.DataFrame, prices: pd.DataFrame, initial_capital=100000) -> pd.Series:
+    # Reference replay, one symbol at a time per bar through the paper trader's decision and sizing rules,
+    # with exact sequential cash.
+    decisions = predictions.set_index('symbol', append=True)[['prediction', 'confidence']]
+    decisions = {key: PaperTradingEngine._decide(*row)['action'] for key, row in
+                 zip(decisions.index, decisions.itertuples(index=False))}
+    capital, positions, curve = float(initial_capital), {}, []
+    for timestamp, row in prices.iterrows():
+        for symbol, price in row.items():
+            action = decisions.get((timestamp, symbol), 'HOLD')
+            if np.isnan(price) or action == 'HOLD':
+                continue
+            if action == 'SELL' and symbol in positions:
+                capital += positions.pop(symbol) * price
+        for symbol, price in row.items():
+            if decisions.get((timestamp, symbol)) == 'BUY' and symbol not in positions and not np.isnan(price):
+                quantity = int(capital * POSITION_SIZE / price)
+                if quantity:
+                    positions[symbol] = quantity
+                    capital -= quantity * price
+        curve.append(capital + sum(quantity * row[symbol] for symbol, quantity in positions.items()
+                                   if not np.isnan(row[symbol])))
+    return pd.Series(curve, index=prices.index)
+
+
+def synthetic_universe(n_symbols: int = 300, years: int = 10, seed: int = 0) -> tuple:
+    # Random-walk closes and random predictions, for timing the accounting without trained models.
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2015-01-01", periods=years * TRADING_DAYS, name="Date")
+    symbols = [f"SYM{i:03d}" for i in range(n_symbols)]
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (len(dates), n_symbols)), axis=0)),
+                          index=dates, columns=symbols)
+    predictions = pd.DataFrame({'symbol': np.tile(symbols, len(dates)),
+                                'prediction': rng.integers(0, 2, len(dates) * n_symbols),
+                                'confidence': rng.uniform(0.5, 0.8, len(dates) * n_symbols)},
+                               index=dates.repeat(n_symbols))
+    return predictions, prices
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Backtest the trading rules over local_data_cache")
+    parser.add_argument("--predict", action="store_true",
+                        help="Refit walk-forward models and cache out-of-sample predictions before the backtest")
+    parser.add_argument("--mode", choices=["per_symbol", "pooled"], default=None,
+                        help="Model per symbol or one pooled model (default: MODEL_MODE)")
+    parser.add_argument("--capital", type=float, default=100000, help="Starting capital")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Time the array replay against a per-symbol loop on a synthetic universe")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        for n_symbols, years in ((30, 5), (300, 10)):
+            predictions, prices = synthetic_universe(n_symbols, years)
+            backtester = Backtester(args.capital)
+            result = backtester.run(predictions, prices)
+            started = time.perf_counter()
+            reference = replay_loop(predictions, prices, args.capital)
+            loop_s = time.perf_counter() - started
+            gap = (result['equity']['equity'] / reference - 1).abs().max()
+            logger.info(f"⏱️ {n_symbols} symbols x {years} years: loop {loop_s:.2f}s vs arrays "
+                        f"{result['summary']['elapsed']:.2f}s ({loop_s / result['summary']['elapsed']:.0f}x), "
+                        f"max equity gap {gap:.3%}")
+        exit(0)
+
+    backtester = Backtester(args.capital)
+    predictions = None if args.predict else backtester.load_predictions()
+    if predictions is None:
+        predictions = backtester.predict(mode=args.mode)
+    if predictions is None:
+        exit(1)
+    result = backtester.run(predictions)
+    backtester.save(result)
+
+    summary = result['summary']
+    print("=" * 50)
+    print(f"💰 Final Value: ${summary['final_value']:,.2f} ({summary['total_return']:+.2f}%)")
+    print(f"📈 Annual Return: {summary['annual_return']:+.2f}%  Sharpe: {summary['sharpe']:.2f}")
+    print(f"📉 Max Drawdown: {summary['max_drawdown']:.2f}%")
+    print(f"📋 Trades: {summary['trades']} (win rate {summary['win_rate']:.1f}%)")
+    exit(0)
@@ -1,22 +1,26 @@
 import os
 import sys
 import logging
-import joblib
 import pandas as pd
 from alpaca_trade_api.rest import REST, TimeFrame
-import pandas_ta as ta  # Make sure pandas_ta is imported
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_collection.streaming_indicators import LiveFeatureState, PRICE_COLUMNS
+from data_collection.feature_registry import compile_plan
+from ml_models.model_registry import ModelRegistry
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
 class TradingEngine:
-    def __init__(self, symbol: str, model_dir="trained_models"):
+    def __init__(self, symbol: str, registry: ModelRegistry = None):
         self.symbol = symbol
-        self.model_path = os.path.join(model_dir, f"{self.symbol}_model.joblib")
-        self.scaler_path = os.path.join(model_dir, f"{self.symbol}_scaler.joblib")
+        self.registry = registry or ModelRegistry()
         self.model = None
         self.scaler = None
+        self.features = None
+        self.feature_state = None
+        self.feature_plan = None
+        self.compiled = None
 
         self.api = REST(
             key_id=os.getenv("ALPACA_API_KEY"),
@@ -28,15 +32,27 @@ class TradingEngine:
 
     def load_model(self):
         try:
-            if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
-                self.model = joblib.load(self.model_path)
-                self.scaler = joblib.load(self.scaler_path)
+            package = self.registry.load(self.symbol)
+            if package is not None:
+                # Usually the memory-mapped compiled trees alone; model and scaler only for uncompilable models.
+                self.compiled = package.get('compiled')
+                self.model = package.get('model')
+                self.scaler = package.get('scaler')
+                self.features = list(package['features'])
+                self.feature_plan = self._compile_feature_plan()
                 logger.info(f"✅ Model and scaler for {self.symbol} loaded successfully.")
             else:
                 logger.error(f"❌ Model or scaler not found for {self.symbol}. Please train first.")
         except Exception as e:
             logger.error(f"Failed to load model for {self.symbol}: {e}")
 
+    def _compile_feature_plan(self):
+        try:
+            return compile_plan(self.features)
+        except ValueError as e:
+            logger.warning(f"Computing the full feature set for {self.symbol}: {e}")
+            return None
+
     def get_latest_data(self) -> pd.DataFrame:
         logger.info(f"Fetching latest market data for {self.symbol}...")
         try:
@@ -51,7 +67,7 @@ class TradingEngine:
             return None
 
     def generate_prediction(self) -> int:
-        if not self.model or not self.scaler:
+        if self.compiled is None and (not self.model or not self.scaler):
             logger.error("Model not loaded, cannot make a prediction.")
             return 0
 
@@ -59,30 +75,37 @@ class TradingEngine:
         if latest_data is None:
             return 0
 
-        latest_data.ta.sma(length=20, append=True)
-        latest_data.ta.sma(length=50, append=True)
-        latest_data.ta.ema(length=20, append=True)
-        latest_data.ta.rsi(length=14, append=True)
-        latest_data.ta.macd(append=True)
-        latest_data.ta.bbands(append=True)
-        latest_data.dropna(inplace=True)
-
-        if latest_data.empty:
-            logger.warning("Not enough data to calculate features for a prediction.")
-            return 0
+        latest_data = latest_data.rename(columns=str.capitalize)[PRICE_COLUMNS]
 
-        feature_columns = self.model.feature_names_in_
+        if self.feature_plan is not None and self.feature_plan.window is not None:
+            # Only the features the model consumes, computed over their trailing window.
+            latest_features = self.feature_plan.latest(latest_data)
+        else:
+            # Seed indicator state from the fetched history once; later calls only feed it the new bars.
+            if self.feature_state is None:
+                self.feature_state = LiveFeatureState().seed(latest_data)
+            else:
+                new_bars = latest_data[latest_data.index > self.feature_state.last_timestamp]
+                for timestamp, bar in zip(new_bars.index, new_bars.to_numpy(dtype=float)):
+                    self.feature_state.update(timestamp, *bar)
+            latest_features = self.feature_state.latest_features()
+        feature_columns = self.features
 
-        missing_cols = [col for col in feature_columns if col not in latest_data.columns]
+        missing_cols = [col for col in feature_columns if col not in latest_features.columns]
         if missing_cols:
             logger.error(f"Missing required feature columns: {missing_cols}")
             return 0
 
-        current_features = latest_data[feature_columns]
-
-        scaled_features = self.scaler.transform(current_features)
+        current_features = latest_features[feature_columns]
+        if current_features.isnull().values.any():
+            logger.warning("Not enough data to calculate features for a prediction.")
+            return 0
 
-        prediction = self.model.predict(scaled_features[-1].reshape(1, -1))[0]
+        if self.compiled is not None:
+            # Thresholds already include the scaler, so the raw row goes straight through the flattened trees.
+            prediction = self.compiled.predict(current_features)[0]
+        else:
+            prediction = self.model.predict(self.scaler.transform(current_features))[0]
 
         if prediction == 1:
             logger.info(f"🧠 Prediction for {self.symbol}: BUY (1)")
@@ -3,121 +3,204 @@ import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import joblib
 import logging
-import io
 import sys
 import time
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config.settings import config
 from data_collection.azure_storage import AzureDataManager
-from data_collection.feature_engineering import FeatureEngineer
+from data_collection.price_store import PriceStore, PRICE_COLUMNS
+from data_collection.streaming_indicators import LiveFeatureState
+from data_collection.feature_registry import compile_plan
+from data_collection.dtype_policy import apply_dtype_policy
+from ml_models.pooled_trainer import POOLED_MODEL, ENCODING_COLUMNS, encode_symbol, symbol_codes
+from ml_models.model_registry import ModelRegistry
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Trading rules, shared with the backtester: act only on predictions at least this confident, and put this share
+# of the remaining cash into each new position.
+CONFIDENCE_THRESHOLD = 0.65
+POSITION_SIZE = 0.05
+
 
 class PaperTradingEngine:
     def __init__(self, initial_capital=100000):
         self.azure_manager = AzureDataManager()
-        self.feature_engineer = FeatureEngineer()
         self.container_name = "market-data"
         self.capital = initial_capital
         self.initial_capital = initial_capital
         self.positions = {}
         self.trade_history = []
-        self.models = {}
+        # Models are loaded on first use (or prefetched per cycle), not at startup.
+        self.registry = ModelRegistry(cache_size=config.model_cache_size)
+        self.feature_states = {}
+        self.feature_plans = {}
         self.local_data_dir = "local_data_cache"
         self.local_data = self._load_all_local_data()
 
-        self.load_models()
-
     def _load_all_local_data(self):
-        data = {}
         if not os.path.exists(self.local_data_dir):
             logger.error(
                 f"Local data cache not found at '{self.local_data_dir}'. Please run `create_local_cache.py` first.")
-            return data
-
-        for file in os.listdir(self.local_data_dir):
-            if file.endswith('.csv'):
-                symbol = file.split('.')[0]
-                try:
-                    df_temp = pd.read_csv(os.path.join(self.local_data_dir, file), nrows=1)
-                    logger.info(f"CSV columns for {symbol}: {list(df_temp.columns)}")
-                    file_path = os.path.join(self.local_data_dir, file)
-
-                    if 'Date' in df_temp.columns:
-                        data[symbol] = pd.read_csv(file_path, index_col='Date', parse_dates=True)
-                    elif 'Datetime' in df_temp.columns:
-                        data[symbol] = pd.read_csv(file_path, index_col='Datetime', parse_dates=True)
-                    else:
-                        data[symbol] = pd.read_csv(file_path, index_col=0, parse_dates=True)
-
-                    logger.info(f"✅ Loaded {len(data[symbol])} rows for {symbol}")
-
-                except Exception as e:
-                    logger.error(f"❌ Failed to load {symbol}: {e}")
-                    try:
-                        data[symbol] = pd.read_csv(os.path.join(self.local_data_dir, file))
-                        logger.info(f"⚠️ Loaded {symbol} without date parsing")
-                    except:
-                        logger.error(f"💥 Completely failed to load {symbol}")
+            return {}
+
+        # Held as the store's memory-mapped float32 columns; features are still computed in float64 from them.
+        # Files written before the store used float32 stay float64 until their next download.
+        data = PriceStore(self.local_data_dir).read_many(columns=PRICE_COLUMNS)
+        for symbol, df in data.items():
+            logger.info(f"✅ Loaded {len(df)} rows for {symbol}")
 
         logger.info(f"Loaded {len(data)} stocks into local data cache for trading simulation.")
         return data
 
-    def load_models(self):
-        for symbol in self.local_data.keys():
-            try:
-                blob_name = f"models/{symbol}/latest_model.pkl"
-                blob_client = self.azure_manager.blob_service_client.get_blob_client(container=self.container_name,
-                                                                                     blob=blob_name)
-                model_data = blob_client.download_blob().readall()
-                self.models[symbol] = joblib.load(io.BytesIO(model_data))
-                logger.info(f"Loaded model for {symbol}")
-            except Exception:
-                logger.warning(f"No trained model found for {symbol}. It will be skipped.")
+    def _model_name(self, symbol):
+        return POOLED_MODEL if config.model_mode == "pooled" else symbol
+
+    def load_models(self, symbols=None) -> dict:
+        # Prefetch latest versions in parallel; anything already in the registry's LRU is not fetched again.
+        symbols = list(self.local_data.keys()) if symbols is None else list(symbols)
+        packages = self.registry.prefetch(self._model_name(symbol) for symbol in symbols)
+        models = {symbol: packages[self._model_name(symbol)] for symbol in symbols}
+        missing = [symbol for symbol, package in models.items() if package is None]
+        if missing:
+            shown = ", ".join(missing[:10]) + (", ..." if len(missing) > 10 else "")
+            logger.warning(f"No trained model found for {len(missing)} symbols ({shown}). They will be skipped.")
+
+        stats = self.registry.stats
+        logger.info(f"Models ready for {len(symbols) - len(missing)}/{len(symbols)} symbols "
+                    f"({stats['loads']} loaded, {stats['hits']} from memory)")
+        cache_stats = getattr(self.azure_manager.storage, 'stats', None)
+        if cache_stats:
+            logger.info(f"Blob cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                        f"{cache_stats['bytes_saved'] / 1e6:.1f} MB served locally")
+        return models
+
+    def get_model(self, symbol):
+        try:
+            return self.registry.load(self._model_name(symbol))
+        except Exception as e:
+            logger.warning(f"Could not load model for {symbol}: {e}")
+            return None
 
     def get_simulated_price(self, symbol):
         if symbol in self.local_data:
-            return self.local_data[symbol]['Close'].tail(50).sample(1).iloc[0]
+            return float(self.local_data[symbol]['Close'].tail(50).sample(1).iloc[0])
         return None
 
-    def get_live_features(self, symbol):
+    def _feature_plan(self, feature_names):
+        key = tuple(feature_names)
+        if key not in self.feature_plans:
+            try:
+                self.feature_plans[key] = compile_plan(key)
+            except ValueError as e:
+                logger.warning(f"{e}. Falling back to the full feature set.")
+                self.feature_plans[key] = None
+        return self.feature_plans[key]
+
+    def get_live_features(self, symbol, feature_names=None):
         if symbol not in self.local_data: return None
-        hist_data = self.local_data[symbol]
-        features_df = self.feature_engineer.create_features(hist_data)
-        return features_df.tail(1)
+        # When every feature the model uses has a bounded lookback, compute just those over the trailing window.
+        plan = self._feature_plan(feature_names) if feature_names is not None else None
+        if plan is not None and plan.window is not None:
+            return plan.latest(self.local_data[symbol])
+        # Indicator state is seeded from history once, then only advanced by new bars.
+        if symbol not in self.feature_states:
+            self.feature_states[symbol] = LiveFeatureState().seed(self.local_data[symbol])
+        return self.feature_states[symbol].latest_features()
+
+    def on_new_bar(self, symbol, timestamp, bar: dict):
+        self.local_data[symbol].loc[timestamp] = [bar[c] for c in self.local_data[symbol].columns]
+        if symbol in self.feature_states:
+            self.feature_states[symbol].update(timestamp, *(bar[c] for c in PRICE_COLUMNS))
+
+    def _live_row(self, symbol, model_payload):
+        # The symbol's latest feature row, in the model's column order.
+        model_features = model_payload['features']
+        indicator_features = [f for f in model_features if f not in ENCODING_COLUMNS]
+        live_features_df = self.get_live_features(symbol, indicator_features)
+        if live_features_df is None: return None
+        if model_payload.get('encodings') is not None:
+            live_features_df = encode_symbol(live_features_df, symbol, model_payload['encodings'])
+        return apply_dtype_policy(live_features_df[model_features].fillna(0))
+
+    def _live_vector(self, symbol, model_payload):
+        # Same values as _live_row as a bare float32 vector, skipping the per-row DataFrame work.
+        model_features = model_payload['features']
+        indicator_features = [f for f in model_features if f not in ENCODING_COLUMNS]
+        live_features_df = self.get_live_features(symbol, indicator_features)
+        if live_features_df is None: return None
+        latest = live_features_df.iloc[-1]
+        codes = symbol_codes(symbol, model_payload['encodings']) if model_payload.get('encodings') else {}
+        row = np.array([codes[f] if f in codes else latest[f] for f in model_features], dtype=np.float32)
+        row[np.isnan(row)] = 0
+        return row
+
+    def _score(self, model_payload, live_features):
+        # (classes, max class probability) for every row.
+        if model_payload.get('compiled') is not None:
+            # One walk of the trees gives the class and its probabilities.
+            labels, proba = model_payload['compiled'].predict_with_proba(live_features)
+            return labels, proba.max(axis=1)
+        # Models are fitted on scaled features, so live rows go through the same scaler.
+        model = model_payload['model']
+        if model_payload.get('scaler') is not None:
+            live_features = model_payload['scaler'].transform(live_features)
+        return model.predict(live_features), model.predict_proba(live_features).max(axis=1)
+
+    @staticmethod
+    def _decide(prediction, confidence) -> dict:
+        action = 'BUY' if prediction == 1 else 'SELL'
+        if confidence < CONFIDENCE_THRESHOLD: action = 'HOLD'
+        return {'action': action, 'confidence': float(confidence)}
 
     def get_prediction(self, symbol: str) -> dict:
         default = {'action': 'HOLD', 'confidence': 0.0}
-        if symbol not in self.models: return default
+        model_payload = self.get_model(symbol)
+        if model_payload is None: return default
 
         try:
-            live_features_df = self.get_live_features(symbol)
-            if live_features_df is None: return default
-
-            model_payload = self.models[symbol]
-            model = model_payload['model']
-            model_features = model_payload['features']
-
-            live_features = live_features_df[model_features].fillna(0)
-
-            prediction = model.predict(live_features)[0]
-            confidence = model.predict_proba(live_features)[0].max()
-
-            action = 'BUY' if prediction == 1 else 'SELL'
-            if confidence < 0.65: action = 'HOLD'
-
-            return {'action': action, 'confidence': float(confidence)}
+            live_features = self._live_row(symbol, model_payload)
+            if live_features is None: return default
+            labels, confidence = self._score(model_payload, live_features)
+            return self._decide(labels[0], confidence[0])
         except Exception as e:
             logger.error(f"Prediction error for {symbol}: {e}")
             return default
 
+    def predict_batch(self, symbols=None) -> dict:
+        # Latest rows of every symbol stacked into one matrix per model (a single one for the pooled model),
+        # each matrix scored in one call.
+        models = self.load_models(symbols)
+        groups = {}
+        for symbol, model_payload in models.items():
+            if model_payload is None: continue
+            try:
+                row = self._live_vector(symbol, model_payload)
+            except Exception as e:
+                logger.error(f"Feature error for {symbol}: {e}")
+                continue
+            if row is None: continue
+            group = groups.setdefault(id(model_payload), (model_payload, [], []))
+            group[1].append(symbol)
+            group[2].append(row)
+
+        predictions = {}
+        for model_payload, group_symbols, rows in groups.values():
+            try:
+                matrix = pd.DataFrame(np.vstack(rows), columns=model_payload['features'])
+                labels, confidence = self._score(model_payload, matrix)
+            except Exception as e:
+                logger.error(f"Prediction error for {group_symbols}: {e}")
+                continue
+            for symbol, prediction, symbol_confidence in zip(group_symbols, labels, confidence):
+                predictions[symbol] = self._decide(prediction, symbol_confidence)
+        return predictions
+
     def execute_trade(self, symbol: str, action: str, price: float):
-        trade_value = self.capital * 0.05  # Use 5% of capital per trade
+        trade_value = self.capital * POSITION_SIZE
         quantity = int(trade_value / price)
         if quantity == 0: return
 
@@ -159,8 +242,8 @@ class PaperTradingEngine:
 
     def run_cycle(self):
         logger.info("--- Starting Trading Simulation Cycle ---")
-        for symbol in list(self.models.keys()):
-            prediction = self.get_prediction(symbol)
+        # Score the whole universe first, then act on the decisions.
+        for symbol, prediction in self.predict_batch().items():
             logger.info(f"Prediction for {symbol}: {prediction['action']} (Confidence: {prediction['confidence']:.2%})")
             if prediction['action'] != 'HOLD':
                 price = self.get_simulated_price(symbol)
@@ -168,10 +251,35 @@ class PaperTradingEngine:
         self.save_state()
         logger.info("--- Trading Cycle Complete ---")
 
+    def compare_inference(self, repeat: int = 5) -> dict:
+        # Scoring latency of the per-symbol loop against the batched path, with models already in memory.
+        symbols = [symbol for symbol, model_payload in self.load_models().items() if model_payload is not None]
+        timings = {}
+        for name, score in (('per_symbol_s', lambda: {s: self.get_prediction(s) for s in symbols}),
+                            ('batched_s', self.predict_batch)):
+            score()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                score()
+            timings[name] = (time.perf_counter() - started) / repeat
+        timings['speedup'] = timings['per_symbol_s'] / timings['batched_s'] if timings['batched_s'] else float('nan')
+        logger.info(f"⏱️ Scoring {len(symbols)} symbols: loop {timings['per_symbol_s'] * 1e3:.1f} ms vs batched "
+                    f"{timings['batched_s'] * 1e3:.1f} ms ({timings['speedup']:.1f}x)")
+        return timings
 
 
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run one paper trading cycle")
+    parser.add_argument("--compare-inference", action="store_true",
+                        help="Time per-symbol scoring against the batched path instead of trading")
+    args = parser.parse_args()
+
     engine = PaperTradingEngine()
+    if args.compare_inference:
+        engine.compare_inference()
+        exit(0)
 
     print("🚀 Starting single trading cycle...")
     print("=" * 50)
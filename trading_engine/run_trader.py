@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from trading_engine.engine import TradingEngine
+from ml_models.model_registry import ModelRegistry
 
 load_dotenv()
 
@@ -14,10 +15,11 @@ def main():
     stocks_to_trade = ['AAPL', 'MSFT', 'GOOGL', 'JPM']
 
     logging.info("--- 🤖 Starting Trading Bot ---")
+    registry = ModelRegistry()
 
     for symbol in stocks_to_trade:
         try:
-            engine = TradingEngine(symbol)
+            engine = TradingEngine(symbol, registry)
             engine.run()
         except Exception as e:
             logging.error(f"An error occurred in the engine for {symbol}: {e}", exc_info=True)